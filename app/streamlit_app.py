@@ -1,16 +1,18 @@
 import streamlit as st
 import sys
 import os
-import time
+import uuid
 import pandas as pd
 
 # Add project root to path so we can import src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from langchain_core.messages import HumanMessage, AIMessage
-from src.agent.graph import agent_app
+from src.agent.graph import get_node_skip_counts, stream_agent_response
+from src.agent.memory import ConversationMemory
+from src.agent.prompt_cache import get_prompt_cache_stats
 from src.data_loaders.custom_loader import get_data_loader
-from src.privacy.data_masking import mask_pii
+from src.privacy.data_masking import MaskedHistory
 from src.config.settings import settings
 
 # Apply settings from config
@@ -104,11 +106,6 @@ st.markdown("""
 loader = get_data_loader()
 customers = loader.customers
 
-def stream_text(text):
-    for char in text.split(" "):
-        yield char + " "
-        time.sleep(0.015) # Slightly faster for modern feel
-
 with st.sidebar:
     st.title("Simulation")
     
@@ -160,10 +157,20 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "last_user" not in st.session_state:
     st.session_state.last_user = selected_user_id
+if "masked_history" not in st.session_state:
+    # Masks each message once across reruns
+    st.session_state.masked_history = MaskedHistory()
+if "session_id" not in st.session_state:
+    # Checkpointed agent state is keyed by session and persona
+    st.session_state.session_id = uuid.uuid4().hex
+if "memory" not in st.session_state:
+    # Last few turns verbatim plus a summary refreshed in the background
+    st.session_state.memory = ConversationMemory()
 
 # Clear chat if user changes
 if st.session_state.last_user != selected_user_id:
     st.session_state.messages = []
+    st.session_state.memory = ConversationMemory()
     st.session_state.last_user = selected_user_id
 
 # Display Chat History
@@ -189,44 +196,55 @@ if user_input:
     # Privacy Check
     processed_input = user_input
     if enable_privacy:
-        processed_input = mask_pii(user_input)
+        # Goes through the history cache so the message is scanned once
+        processed_input = st.session_state.masked_history.mask_message(st.session_state.messages[-1]).content
         if processed_input != user_input:
             with st.status("🛡️ Privacy Shield Active"):
                 st.write(f"**Original:** {user_input}")
                 st.write(f"**Masked sent to LLM:** {processed_input}")
 
-    # Run Agent
-    with st.spinner("Thinking..."):
-        try:
-            # Prepare inputs for the graph
-            graph_inputs = {
-                "user_id": selected_user_id,
-                "messages": st.session_state.messages,
-                "intent": "general"
-            }
-            
-            # Invoke Graph
-            result = agent_app.invoke(graph_inputs)
-            ai_response = result["final_response"]
-            
-        except Exception as e:
-            ai_response = f"⚠️ Error: {str(e)}"
-            result = {}
+    # Prepare inputs for the graph (the whole history is masked, not only
+    # the newest message)
+    history = st.session_state.messages
+    if enable_privacy:
+        history = st.session_state.masked_history.mask(history)
+    # Only recent turns go verbatim; older ones arrive as the summary
+    recent_messages, summary = st.session_state.memory.context(history)
+    graph_inputs = {
+        "user_id": selected_user_id,
+        "messages": recent_messages,
+        "conversation_summary": summary,
+        "mask_pii": enable_privacy,
+        "intent": "general"
+    }
 
-    # streaming
+    # Run Agent, writing tokens as the LLM produces them
+    result = {}
     with st.chat_message("assistant", avatar="🤖"):
         response_placeholder = st.empty()
+        response_placeholder.markdown("_Thinking..._")
         full_response = ""
         
-        # Simulate typing effect
-        for chunk in stream_text(ai_response):
-            full_response += chunk
-            response_placeholder.markdown(full_response + "▌")
-        response_placeholder.markdown(full_response)
+        try:
+            for chunk in stream_agent_response(graph_inputs, result,
+                                               session_id=st.session_state.session_id,
+                                               thread_id=selected_user_id):
+                full_response += chunk
+                response_placeholder.markdown(full_response + "▌")
+            ai_response = full_response
+        except Exception as e:
+            ai_response = f"⚠️ Error: {str(e)}"
+            result = {}
+        response_placeholder.markdown(ai_response)
         
     st.session_state.messages.append(AIMessage(content=ai_response))
+    # Fold turns that left the window into the summary, off the request path
+    st.session_state.memory.refresh(history + [AIMessage(content=ai_response)])
 
     with st.expander("🧠 View Agent Reasoning & Retrieved Context"):
+        st.caption(f"Intent: `{result.get('intent', 'unknown')}` | Nodes skipped so far: {get_node_skip_counts()}")
+        token_stats = get_prompt_cache_stats().snapshot()
+        st.caption(f"Prompt tokens: {token_stats['cached_tokens']} cached / {token_stats['uncached_tokens']} uncached over {token_stats['calls']} calls")
         c1, c2 = st.columns(2)
         
         # Location Context & Map
@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import settings
+
+MESSAGES = [
+    "hi",
+    "Where is my order {order_id}?",
+    "Where is the nearest store?",
+    "What is your refund policy?",
+    "I'm freezing, can you recommend something hot?",
+]
+
+
+def main():
+    """Time agent turns against the fake LLM, splitting pipeline overhead from model time"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--turns', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=1, help='Concurrent turns (async graph)')
+    parser.add_argument('--profile', default='realistic', help='Fake LLM latency profile')
+    parser.add_argument('--response-tokens', type=int, default=40)
+    args = parser.parse_args()
+
+    # Must be set before the agent nodes build their models. Embeddings
+    # are faked too, so the run needs no API key or network, and the
+    # index is built in a scratch directory rather than over the real one
+    settings.LLM_PROVIDER = 'fake'
+    settings.FAKE_LLM_PROFILE = args.profile
+    settings.FAKE_LLM_RESPONSE_TOKENS = args.response_tokens
+    settings.EMBEDDING_PROVIDER = 'fake'
+    # Hashed embeddings rank intents like Gemini's but score lower
+    settings.INTENT_MIN_SIMILARITY = 0.3
+    scratch = tempfile.TemporaryDirectory()
+    settings.VECTORSTORE_PATH = Path(scratch.name)
+
+    from src.rag.retriever import initialize_vectorstore
+    initialize_vectorstore()
+
+    from langchain_core.messages import HumanMessage
+    from src.agent.graph import agent_app
+    from src.agent.llm_provider import get_fake_model_stats
+    from src.data_loaders.custom_loader import get_data_loader
+
+    # (customer id, one of their own order ids), so order questions can
+    # take the templated no-LLM path
+    personas = []
+    for customer in get_data_loader().customers:
+        order_ids = [o.get('order_id') for o in customer.get('order_history') or [] if o.get('order_id')]
+        personas.append((customer['customer_id'], order_ids[0] if order_ids else 'ORD0000'))
+    personas = personas or [('GUEST', 'ORD0000')]
+
+    def turn_inputs(i):
+        customer_id, order_id = personas[i % len(personas)]
+        return {
+            'user_id': customer_id,
+            'messages': [HumanMessage(content=MESSAGES[i % len(MESSAGES)].format(order_id=order_id))],
+        }
+
+    async def run_concurrent():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            async with semaphore:
+                await agent_app.ainvoke(turn_inputs(i))
+
+        await asyncio.gather(*(one(i) for i in range(args.turns)))
+
+    # Warm up caches and lazy imports
+    agent_app.invoke(turn_inputs(0))
+    stats = get_fake_model_stats()
+    stats.reset()
+
+    start = time.perf_counter()
+    if args.concurrency > 1:
+        asyncio.run(run_concurrent())
+    else:
+        for i in range(args.turns):
+            agent_app.invoke(turn_inputs(i))
+    wall = time.perf_counter() - start
+    model = stats.snapshot()
+
+    print("=" * 60)
+    print("Agent Pipeline Benchmark (fake LLM)")
+    print("=" * 60)
+    print(f"Profile: {args.profile} | turns: {args.turns} | concurrency: {args.concurrency}")
+    print(f"LLM calls:        {model['calls']} ({args.turns - model['calls']} turns answered without the LLM)")
+    print(f"Wall time:        {wall:8.3f} s ({args.turns / wall:.1f} turns/s)")
+    print(f"Model time:       {model['model_time_sec']:8.3f} s (summed over calls)")
+    if args.concurrency == 1:
+        overhead = wall - model['model_time_sec']
+        print(f"Pipeline overhead:{overhead:8.3f} s ({overhead / args.turns * 1000:.1f} ms/turn)")
+
+    scratch.cleanup()
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,97 @@
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.context_parser import ContextParser
+
+MESSAGES = [
+    "Where is my order ORD1001? It's really late",
+    "I'm freezing, can you recommend a hot chocolate near me?",
+    "I want a refund for the cold coffee I got, this is urgent",
+    "What should I get for breakfast, maybe a croissant or a muffin",
+    "hi",
+    "The weather is hot today, something iced or a cold brew please, quick!",
+]
+
+
+def legacy_parse(message):
+    """Previous implementation: a separate scan per extractor"""
+    message_lower = message.lower()
+
+    intents = []
+    for intent, patterns in ContextParser.INTENT_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, message_lower):
+                intents.append(intent)
+                break
+
+    temperature = None
+    for temp_type, keywords in ContextParser.TEMPERATURE_KEYWORDS.items():
+        if any(keyword in message_lower for keyword in keywords):
+            temperature = temp_type
+            break
+
+    preferences = [
+        category for category, keywords in ContextParser.PRODUCT_CATEGORIES.items()
+        if any(keyword in message_lower for keyword in keywords)
+    ]
+
+    order_id = None
+    for pattern in ContextParser.ORDER_ID_PATTERNS:
+        match = re.search(pattern, message.upper())
+        if match:
+            order_id = match.group(0).lstrip('#')
+            break
+
+    return {
+        'intents': intents or ['general_query'],
+        'temperature_context': temperature,
+        'product_preferences': preferences,
+        'order_id': order_id,
+        'is_urgent': any(keyword in message_lower for keyword in ContextParser.URGENT_KEYWORDS),
+    }
+
+
+def per_message_us(fn, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            fn(message)
+    return (time.perf_counter() - start) / (rounds * len(messages)) * 1e6
+
+
+def main():
+    """Compare per-message latency of the precompiled context scanner"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--rounds', type=int, default=20000)
+    args = parser.parse_args()
+
+    for message in MESSAGES + [" ".join(MESSAGES)]:
+        assert legacy_parse(message) == ContextParser.scan(message), message
+
+    print("=" * 60)
+    print("Context Parser Benchmark")
+    print("=" * 60)
+
+    # Messages from a few dozen characters to several kilobytes; rounds
+    # shrink with length so every row takes about as long
+    print(f"\n{'length':>8}  {'separate scans':>16}  {'scanner':>16}")
+    for repeat in (0, 1, 2, 5, 10, 30):
+        messages = [" ".join(MESSAGES * repeat)] if repeat else MESSAGES
+        length = sum(len(m) for m in messages) // len(messages)
+        rounds = max(args.rounds // max(repeat * 10, 1), 50)
+        legacy = per_message_us(legacy_parse, messages, rounds)
+        scanner = per_message_us(ContextParser.scan, messages, rounds)
+        print(f"{length:>8}  {legacy:>11.2f} us/msg  {scanner:>11.2f} us/msg  ({legacy / scanner:.1f}x)")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,89 @@
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.privacy.data_masking import PIIMasker
+
+
+def legacy_mask_text(text, entities=None):
+    """Previous implementation: one pass per pattern, str.replace per match"""
+    if entities is None:
+        entities = list(PIIMasker.PATTERNS.keys())
+
+    masked_text = text
+    detected = []
+    for entity_type in entities:
+        for pattern in PIIMasker.PATTERNS[entity_type]:
+            for match in re.finditer(pattern, masked_text):
+                original = match.group(0)
+                detected.append({'type': entity_type, 'original': original,
+                                 'start': match.start(), 'end': match.end()})
+                masked_text = masked_text.replace(original, PIIMasker.MASKS[entity_type])
+    return masked_text, detected
+
+
+def make_transcript(turns, seed=0):
+    """Synthetic support chat with PII sprinkled through some turns"""
+    rng = random.Random(seed)
+    filler = ("I ordered a caramel latte yesterday and it arrived cold, "
+              "can you check what happened with my order please")
+    pii = [
+        lambda: f"my number is +91-9{rng.randrange(10**9):09d}",
+        lambda: f"email me at user{rng.randrange(10**6)}@email.com",
+        lambda: f"card {rng.randrange(10**4):04d} {rng.randrange(10**4):04d} "
+                f"{rng.randrange(10**4):04d} {rng.randrange(10**4):04d}",
+        lambda: f"from 10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+    ]
+    lines = []
+    for i in range(turns):
+        line = filler
+        if i % 3 == 0:
+            line = f"{line} - {rng.choice(pii)()}"
+        lines.append(f"User: {line}")
+    return "\n".join(lines)
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    """Compare single-pass PII masking with the per-pattern approach"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--turns', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PII Masking Benchmark")
+    print("=" * 60)
+
+    for turns in args.turns:
+        text = make_transcript(turns)
+        size_mb = len(text) / 2**20
+
+        legacy_time = best_of(lambda: legacy_mask_text(text))
+        new_time = best_of(lambda: PIIMasker.mask_text(text))
+        _, detected = PIIMasker.mask_text(text)
+
+        print(f"\n{turns:,} turns ({len(text):,} chars, {len(detected):,} entities):")
+        print(f"  per-pattern: {legacy_time * 1000:>9.1f} ms  ({size_mb / legacy_time:>7.1f} MB/s)")
+        print(f"  single-pass: {new_time * 1000:>9.1f} ms  ({size_mb / new_time:>7.1f} MB/s)")
+        print(f"  speedup:     {legacy_time / new_time:>9.1f}x")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
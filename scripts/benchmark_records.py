@@ -0,0 +1,179 @@
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import settings
+from src.data_loaders.records import compact_records
+
+
+def make_products(n):
+    """Synthetic products shaped like data/products.json"""
+    categories = ['hot_beverage', 'cold_beverage', 'food']
+    return [
+        {
+            "product_id": f"PROD{i:07d}",
+            "name": f"Product {i}",
+            "category": categories[i % 3],
+            "description": "Synthetic catalog item",
+            "price": 100 + i % 400,
+            "temperature": 'hot' if i % 2 else 'cold',
+            "is_seasonal": i % 10 == 0,
+            "calories": i % 600,
+        }
+        for i in range(n)
+    ]
+
+
+def make_customers(n):
+    """Synthetic customers shaped like data/customers.json"""
+    return [
+        {
+            "customer_id": f"CUST{i:07d}",
+            "name": f"Customer {i}",
+            "email": f"customer{i}@email.com",
+            "phone": f"+91-9{i:09d}",
+            "location": {
+                "latitude": 28.4 + (i % 1000) / 2000,
+                "longitude": 77.0 + (i % 997) / 2000,
+                "city": "Delhi",
+                "address": "Sector 1",
+            },
+            "preferences": {},
+            "order_history": [
+                {"order_id": f"ORD{i:07d}-{j}", "store_id": "STORE001", "date": "2024-12-01",
+                 "items": [f"PROD{(i + j) % 30:07d}", f"PROD{(i + 7 * j) % 30:07d}"],
+                 "total": 200, "status": "delivered"}
+                for j in range(3)
+            ],
+            "loyalty_points": i % 1000,
+            "join_date": "2024-01-01",
+        }
+        for i in range(n)
+    ]
+
+
+def measure(build):
+    """Return (result, bytes allocated while building it)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(label, dict_value, compact_value, unit):
+    ratio = dict_value / compact_value if compact_value else float('inf')
+    print(f"  {label:<28} dict: {dict_value:>10.1f} {unit}   "
+          f"compact: {compact_value:>10.1f} {unit}   ({ratio:.2f}x)")
+
+
+def main():
+    """Compare plain dicts with slotted records for memory and lookups"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--records', type=int, default=1_000_000)
+    parser.add_argument('--app-records', type=int, default=20_000,
+                        help='Customers for the loader and formatter timings')
+    args = parser.parse_args()
+    n = args.records
+
+    print("=" * 60)
+    print(f"Record Benchmark ({n:,} records)")
+    print("=" * 60)
+
+    for collection, make in (('products', make_products), ('customers', make_customers)):
+        # The source dicts are temporary on the compact side, so only the
+        # records that survive are counted
+        dicts, dict_bytes = measure(lambda: make(n))
+        compact, compact_bytes = measure(lambda: compact_records(collection, make(n)))
+
+        print(f"\n{collection}:")
+        report("memory", dict_bytes / 2**20, compact_bytes / 2**20, "MB")
+        report("bytes per record", dict_bytes / n, compact_bytes / n, "B ")
+
+        # Each side is read the way the code reads it: the compact backend's
+        # own filters use slots, shared consumers use the mapping interface
+        if collection == 'products':
+            dict_time = best_of(lambda: [p for p in dicts if p.get('temperature') == 'hot'])
+            compact_time = best_of(lambda: [p for p in compact if p.temperature == 'hot'])
+            report("backend temperature filter", dict_time * 1000, compact_time * 1000, "ms")
+        else:
+            dict_time = best_of(lambda: sum(c['loyalty_points'] for c in dicts))
+            compact_time = best_of(lambda: sum(c['loyalty_points'] for c in compact))
+            report("sum ['loyalty_points']", dict_time * 1000, compact_time * 1000, "ms")
+
+            dict_time = best_of(lambda: [c.get('location', {}).get('latitude') for c in dicts])
+            compact_time = best_of(lambda: [c.get('location', {}).get('latitude') for c in compact])
+            report("read .get latitude", dict_time * 1000, compact_time * 1000, "ms")
+
+        del dicts, compact
+
+    benchmark_app_paths(args.app_records)
+
+    return True
+
+
+def benchmark_app_paths(n):
+    """
+    Time the paths the agent actually uses (loader lookups and the order
+    history formatter) with the JSON backend on plain dicts and on records
+    """
+    # Must be set before the agent nodes are imported
+    settings.LLM_PROVIDER = 'fake'
+    settings.EMBEDDING_PROVIDER = 'fake'
+    from src.agent.nodes import _format_order_history
+    from src.data_loaders.custom_loader import CustomerDataLoader
+    from src.data_loaders.storage import CompactJSONStorageBackend, JSONStorageBackend
+
+    print(f"\nApp paths ({n:,} customers, 30 products):")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, records in (('CUSTOMERS_FILE', make_customers(n)), ('PRODUCTS_FILE', make_products(30))):
+            path = Path(tmp) / f"{name.lower()}.json"
+            path.write_text(json.dumps(records), encoding='utf-8')
+            setattr(settings, name, path)
+
+        loaders = [CustomerDataLoader(JSONStorageBackend()), CustomerDataLoader(CompactJSONStorageBackend())]
+
+    customer_ids = [f"CUST{i:07d}" for i in range(0, n, max(n // 1000, 1))]
+
+    def format_all(loader):
+        for customer in loader.customers:
+            _format_order_history(customer.get('order_history', []), loader)
+
+    def lookup(loader):
+        for customer_id in customer_ids:
+            customer = loader.get_customer_by_id(customer_id)
+            _format_order_history(customer.get('order_history', []), loader)
+
+    def product_names(loader):
+        for i in range(n):
+            loader.get_product_name(f"PROD{i % 30:07d}")
+
+    for label, fn, unit in (
+        ("_format_order_history, all", format_all, "ms"),
+        ("get_customer + format x1000", lookup, "ms"),
+        ("get_product_name", product_names, "ms"),
+    ):
+        report(label, *(best_of(lambda: fn(loader)) * 1000 for loader in loaders), unit)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_loaders.storage import import_json_to_sqlite
+from src.config import settings
+
+
+def main():
+    """Import the JSON data files into the SQLite storage backend"""
+    print("=" * 60)
+    print("SQLite Import")
+    print("=" * 60)
+    
+    print(f"\nImporting into {settings.SQLITE_DB_PATH}...")
+    counts = import_json_to_sqlite()
+    
+    for collection, count in counts.items():
+        print(f"  ✓ {collection}: {count}")
+    
+    print("\n" + "=" * 60)
+    print("✓ Import complete!")
+    print("=" * 60)
+    print("\nSet STORAGE_BACKEND=sqlite in .env to use the database")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -1,32 +1,234 @@
-from langgraph.graph import StateGraph, END
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Iterator, List
+
+from langchain_core.messages import AIMessageChunk, RemoveMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from src.config import settings
 from src.agent.state import AgentState
+from src.privacy.data_masking import mask_pii_stream
 from src.agent.nodes import (
+    ERROR_RESPONSE,
+    masks_pii,
+    chunk_text,
     retrieve_customer_info,
+    aretrieve_customer_info,
+    classify_intent,
+    aclassify_intent,
     check_location_context,
+    acheck_location_context,
     retrieve_knowledge,
-    generate_response
+    aretrieve_knowledge,
+    answer_order_status,
+    aanswer_order_status,
+    generate_response,
+    agenerate_response,
+    can_answer_order_status,
+    needs_location,
+    needs_knowledge,
+    customer_is_fresh,
+    location_is_fresh
 )
 
-def build_agent_graph():
+# How often each node was skipped by routing
+_skip_counts = Counter()
+_skip_lock = threading.Lock()
+
+def _skip(*nodes: str):
+    with _skip_lock:
+        _skip_counts.update(nodes)
+
+def get_node_skip_counts() -> Dict[str, int]:
+    """Number of turns that bypassed each node"""
+    with _skip_lock:
+        return dict(_skip_counts)
+
+def route_start(state: AgentState) -> List[str]:
+    """
+    Skip the customer lookup when a checkpointed earlier turn already
+    holds a profile built from the same customer and data version
+    """
+    if customer_is_fresh(state):
+        _skip("get_customer")
+        return ["get_intent"]
+    return ["get_customer", "get_intent"]
+
+def route_context(state: AgentState) -> List[str]:
+    """
+    Pick the next nodes once customer and intent are known
+    
+    Location lookup and knowledge retrieval are independent, so when both
+    are needed they run as parallel branches that join before generate.
+    """
+    if can_answer_order_status(state):
+        _skip("get_location", "get_knowledge", "generate")
+        return ["answer_order"]
+    
+    branches = []
+    if needs_location(state) and not location_is_fresh(state):
+        branches.append("get_location")
+    else:
+        _skip("get_location")
+    if needs_knowledge(state):
+        branches.append("get_knowledge")
+    else:
+        _skip("get_knowledge")
+    
+    return branches or ["generate"]
+
+def _node(func, afunc) -> RunnableLambda:
+    """Node with a sync and an async implementation, so the compiled graph
+    serves invoke/stream as well as ainvoke/astream"""
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+def join_context(state: AgentState):
+    """Node: Join point after customer and intent lookups (no update)."""
+    return {}
+
+def get_checkpointer():
+    """
+    SQLite checkpointer for per-session state, or None when checkpointing
+    is off or langgraph-checkpoint-sqlite is not installed
+    
+    The saver is synchronous, so the graph compiled with it (session_app)
+    serves invoke/stream only.
+    """
+    if not settings.CHECKPOINT_ENABLED:
+        return None
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        print("Warning: langgraph-checkpoint-sqlite is not installed, session checkpointing is off")
+        return None
+    settings.CHECKPOINT_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(settings.CHECKPOINT_DB_PATH), check_same_thread=False)
+    return SqliteSaver(conn)
+
+def build_agent_graph(checkpointer=None):
     # Langgraph workflow
 
     workflow = StateGraph(AgentState)
 
     # 1. Add Nodes
-    workflow.add_node("get_customer", retrieve_customer_info)
-    workflow.add_node("get_location", check_location_context)
-    workflow.add_node("get_knowledge", retrieve_knowledge)
-    workflow.add_node("generate", generate_response)
+    workflow.add_node("get_customer", _node(retrieve_customer_info, aretrieve_customer_info))
+    workflow.add_node("get_intent", _node(classify_intent, aclassify_intent))
+    workflow.add_node("plan", join_context)
+    workflow.add_node("get_location", _node(check_location_context, acheck_location_context))
+    workflow.add_node("get_knowledge", _node(retrieve_knowledge, aretrieve_knowledge))
+    workflow.add_node("answer_order", _node(answer_order_status, aanswer_order_status))
+    workflow.add_node("generate", _node(generate_response, agenerate_response))
 
-    workflow.set_entry_point("get_customer")
+    # 2. Customer and intent lookups are independent: run them in
+    # parallel (both finish in the same step, so plan runs once). The
+    # customer lookup is skipped when a checkpoint already has it
+    workflow.add_conditional_edges(START, route_start, ["get_customer", "get_intent"])
+    workflow.add_edge("get_customer", "plan")
+    workflow.add_edge("get_intent", "plan")
     
-    workflow.add_edge("get_customer", "get_location")
-    workflow.add_edge("get_location", "get_knowledge")
+    # 3. Route by intent: store lookup and RAG run (in parallel) only when
+    # the turn needs them; each writes its own state keys, so the
+    # branches merge without conflicts. Plain order-status questions skip
+    # the LLM entirely
+    workflow.add_conditional_edges(
+        "plan",
+        route_context,
+        ["answer_order", "get_location", "get_knowledge", "generate"]
+    )
+    workflow.add_edge("get_location", "generate")
     workflow.add_edge("get_knowledge", "generate")
+    workflow.add_edge("answer_order", END)
     workflow.add_edge("generate", END)
 
-    # 3. Compile
-    return workflow.compile()
+    # 4. Compile
+    return workflow.compile(checkpointer=checkpointer)
 
-# Single instance
-agent_app = build_agent_graph()
\ No newline at end of file
+# Single instances: agent_app keeps no state between calls and serves
+# invoke/stream and ainvoke/astream; session_app resumes checkpointed
+# sessions (sync only) and is None when checkpointing is off
+agent_app = build_agent_graph()
+_checkpointer = get_checkpointer()
+session_app = build_agent_graph(_checkpointer) if _checkpointer else None
+
+# Per-turn state that must not carry over from a checkpointed earlier turn
+TURN_RESET = {"rag_context": "", "order_context": "", "final_response": "", "error": ""}
+
+def session_inputs(inputs: Dict, session_id: str, thread_id: str):
+    """
+    Graph inputs and config for one turn of a checkpointed session
+    
+    The stored messages are replaced by the caller's (the caller decides
+    the window), per-turn results are cleared, and user_info and
+    location_context carry over until their inputs change.
+    
+    Args:
+        inputs: Graph inputs (user_id, messages, ...)
+        session_id: Browser or client session
+        thread_id: Conversation within the session
+    
+    Returns:
+        (inputs, config)
+    """
+    turn_inputs = {
+        **TURN_RESET,
+        **inputs,
+        "messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *inputs.get("messages", [])],
+    }
+    config = {"configurable": {"thread_id": f"{session_id}:{thread_id}"}}
+    return turn_inputs, config
+
+def stream_agent_response(inputs: Dict, final_state: Dict = None,
+                          session_id: str = None, thread_id: str = None) -> Iterator[str]:
+    """
+    Run the agent and yield response text as the LLM produces it
+    
+    Args:
+        inputs: Graph inputs (user_id, messages, ...)
+        final_state: Optional dict that is filled with the final graph state
+        session_id: Session to resume when checkpointing is on (without
+            one, the turn runs on the stateless graph)
+        thread_id: Conversation within the session (defaults to the user id)
+    
+    Yields:
+        Response text chunks; answers that skip the LLM (templated order
+        status, errors) arrive as one chunk at the end. If generation fails
+        part-way, the partial answer is followed by an error notice. With
+        PII masking on, the text is masked as it streams.
+    """
+    if final_state is None:
+        final_state = {}
+    
+    app, config = agent_app, None
+    if session_app is not None and session_id:
+        app = session_app
+        inputs, config = session_inputs(inputs, session_id, thread_id or inputs.get("user_id"))
+    
+    chunks = _response_text(app, inputs, config, final_state)
+    if masks_pii(inputs):
+        chunks = mask_pii_stream(chunks)
+    yield from chunks
+
+def _response_text(app, inputs: Dict, config, final_state: Dict) -> Iterator[str]:
+    streamed = False
+    
+    for mode, payload in app.stream(inputs, config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final_state.clear()
+            final_state.update(payload)
+            continue
+        
+        chunk, metadata = payload
+        # Token chunks only; the node's final message is in the state
+        if isinstance(chunk, AIMessageChunk) and metadata.get("langgraph_node") == "generate":
+            text = chunk_text(chunk)
+            if text:
+                streamed = True
+                yield text
+    
+    if final_state.get("error"):
+        # Never pass a truncated answer off as complete
+        yield ("\n\n⚠️ " if streamed else "") + ERROR_RESPONSE
+    elif not streamed and final_state.get("final_response"):
+        yield final_state["final_response"]
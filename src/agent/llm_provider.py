@@ -0,0 +1,219 @@
+"""
+Chat model providers
+Settings.LLM_PROVIDER picks the model the agent talks to: Gemini, or a
+local fake that answers deterministically with realistic latency, for
+offline runs, profiling and load tests
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.config import settings
+
+# Latency profiles: (seconds to first token, tokens per second, jitter as a
+# fraction of each delay)
+LATENCY_PROFILES = {
+    "instant": (0.0, 0.0, 0.0),
+    "fast": (0.15, 250.0, 0.1),
+    "realistic": (0.6, 80.0, 0.25),
+    "slow": (2.0, 25.0, 0.3),
+}
+
+_WORDS = (
+    "we", "can", "help", "with", "that", "your", "order", "store", "nearby",
+    "today", "fresh", "coffee", "policy", "points", "happy", "to", "check",
+    "the", "details", "and", "get", "back", "soon", "thanks", "for", "waiting",
+)
+
+
+def estimate_prompt_tokens(messages: List[BaseMessage]) -> int:
+    """Rough token count (about four characters per token)"""
+    return sum((len(str(message.content)) + 3) // 4 for message in messages)
+
+
+class FakeModelStats:
+    """Thread-safe totals of the time a fake model spent 'generating'"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.model_time_sec = 0.0
+        self.output_tokens = 0
+
+    def record(self, model_time_sec: float, output_tokens: int):
+        with self._lock:
+            self.calls += 1
+            self.model_time_sec += model_time_sec
+            self.output_tokens += output_tokens
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.model_time_sec = 0.0
+            self.output_tokens = 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "model_time_sec": round(self.model_time_sec, 4),
+                "output_tokens": self.output_tokens,
+            }
+
+
+_fake_model_stats = FakeModelStats()
+
+
+def get_fake_model_stats() -> FakeModelStats:
+    """Simulated model time across every FakeChatModel call"""
+    return _fake_model_stats
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic local chat model
+
+    The same prompt always gets the same answer, streamed one token at a
+    time with a first-token delay and a token rate taken from a latency
+    profile. Delays are slept for real, so pipeline overhead is the wall
+    time minus get_fake_model_stats().model_time_sec.
+    """
+
+    first_token_latency: float = 0.0
+    tokens_per_second: float = 0.0
+    jitter: float = 0.0
+    response_tokens: int = 40
+    seed: int = 0
+
+    @classmethod
+    def from_profile(cls, profile: str, **kwargs) -> "FakeChatModel":
+        """
+        Build a fake model from a named latency profile
+
+        Args:
+            profile: Key of LATENCY_PROFILES
+            **kwargs: Field overrides (response_tokens, seed, ...)
+        """
+        if profile not in LATENCY_PROFILES:
+            raise ValueError(f"Unknown latency profile: {profile} (expected one of {list(LATENCY_PROFILES)})")
+        first_token, rate, jitter = LATENCY_PROFILES[profile]
+        return cls(first_token_latency=first_token, tokens_per_second=rate, jitter=jitter, **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _plan(self, messages: List[BaseMessage]):
+        """Response tokens and the delay before each, fixed by the prompt"""
+        digest = hashlib.sha256(
+            "\x1e".join(f"{message.type}:{message.content}" for message in messages).encode("utf-8")
+        ).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big") ^ self.seed)
+
+        last_human = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        topic = " ".join(last_human.split()[:6])
+        tokens = ["Thanks", " for", " asking"] + ([f' about "{topic}".'] if topic else ["."])
+        while len(tokens) < self.response_tokens:
+            tokens.append(" " + rng.choice(_WORDS))
+        tokens = tokens[:max(self.response_tokens, 1)]
+        tokens[-1] += "."
+
+        def delay(base: float) -> float:
+            return max(0.0, base * (1 + rng.uniform(-self.jitter, self.jitter)))
+
+        per_token = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        delays = [delay(self.first_token_latency)] + [delay(per_token) for _ in tokens[1:]]
+        return tokens, delays
+
+    def _chunk(self, text: str, index: int, total: int, input_tokens: int) -> ChatGenerationChunk:
+        usage = None
+        if index == total - 1:
+            # Usage on the last chunk only, so chunks add up to the totals
+            usage = {"input_tokens": input_tokens, "output_tokens": total, "total_tokens": input_tokens + total}
+        return ChatGenerationChunk(message=AIMessageChunk(content=text, usage_metadata=usage))
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens, delays = self._plan(messages)
+        input_tokens = estimate_prompt_tokens(messages)
+        for index, (token, wait) in enumerate(zip(tokens, delays)):
+            if wait:
+                time.sleep(wait)
+            chunk = self._chunk(token, index, len(tokens), input_tokens)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        _fake_model_stats.record(sum(delays), len(tokens))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens, delays = self._plan(messages)
+        input_tokens = estimate_prompt_tokens(messages)
+        for index, (token, wait) in enumerate(zip(tokens, delays)):
+            if wait:
+                await asyncio.sleep(wait)
+            chunk = self._chunk(token, index, len(tokens), input_tokens)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        _fake_model_stats.record(sum(delays), len(tokens))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = None
+        for chunk in self._stream(messages, stop, run_manager, **kwargs):
+            message = chunk.message if message is None else message + chunk.message
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(
+            content=message.content, usage_metadata=message.usage_metadata
+        ))])
+
+
+def get_chat_model():
+    """
+    Chat model selected by LLM_PROVIDER
+
+    Returns:
+        ChatGoogleGenerativeAI ("gemini") or FakeChatModel ("fake", using
+        FAKE_LLM_PROFILE and FAKE_LLM_RESPONSE_TOKENS)
+    """
+    provider = settings.LLM_PROVIDER.lower()
+    if provider == "fake":
+        return FakeChatModel.from_profile(
+            settings.FAKE_LLM_PROFILE,
+            response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS
+        )
+    if provider != "gemini":
+        raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER} (expected 'gemini' or 'fake')")
+
+    # Imported here so the fake provider runs without the Gemini client
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=settings.GEMINI_MODEL,
+        google_api_key=settings.GOOGLE_API_KEY,
+        temperature=settings.TEMPERATURE,
+        top_p=settings.TOP_P,
+        max_output_tokens=settings.MAX_TOKENS
+    )
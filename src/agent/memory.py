@@ -0,0 +1,206 @@
+"""
+Bounded conversation memory
+The prompt gets the last few turns verbatim plus a running summary of
+everything older; the summary is folded forward on a background thread
+so no turn waits for it
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from src.config import settings
+
+# Shared worker for summary refreshes across sessions
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+
+SUMMARY_PROMPT = """You maintain a running summary of a customer support chat.
+
+Current summary:
+{summary}
+
+New messages to fold in:
+{transcript}
+
+Write the updated summary in at most {budget_words} words. Keep order IDs,
+products, preferences, complaints and anything the customer was promised.
+Return only the summary."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def trim_to_budget(text: str, token_budget: int) -> str:
+    """Cut text to the token budget, at a sentence or word boundary if possible"""
+    max_chars = token_budget * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = max(cut.rfind('. '), cut.rfind('\n'))
+    if boundary < max_chars // 2:
+        boundary = cut.rfind(' ')
+    return cut[:boundary + 1].rstrip() if boundary > 0 else cut
+
+
+def format_transcript(messages: List[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        role = "Customer" if isinstance(message, HumanMessage) else "Agent"
+        lines.append(f"{role}: {message.content}")
+    return "\n".join(lines)
+
+
+def extractive_summary(summary: str, messages: List[BaseMessage], token_budget: int) -> str:
+    """
+    Fallback summary without an LLM: the newest lines that fit the budget
+    
+    Args:
+        summary: Current summary
+        messages: Messages to fold in
+        token_budget: Maximum summary size in tokens
+    
+    Returns:
+        Updated summary
+    """
+    lines = [line for line in summary.split("\n") if line]
+    for message in messages:
+        role = "Customer" if isinstance(message, HumanMessage) else "Agent"
+        lines.append(f"{role}: {trim_to_budget(' '.join(str(message.content).split()), 40)}")
+    
+    kept, used = [], 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(reversed(kept))
+
+
+def llm_summary(summary: str, messages: List[BaseMessage], token_budget: int) -> str:
+    """
+    Fold messages into the summary with the chat model
+    
+    Falls back to extractive_summary if the model call fails.
+    """
+    try:
+        # Imported lazily: the model is created with the agent nodes
+        from src.agent.nodes import chunk_text, llm
+        response = llm.invoke(SUMMARY_PROMPT.format(
+            summary=summary or "(empty)",
+            transcript=format_transcript(messages),
+            budget_words=max(20, token_budget * 3 // 4)
+        ))
+        return trim_to_budget(chunk_text(response).strip(), token_budget)
+    except Exception as e:
+        print(f"Warning: Summary refresh failed, using extractive summary: {e}")
+        return extractive_summary(summary, messages, token_budget)
+
+
+class ConversationMemory:
+    """
+    Recent turns verbatim plus a running summary, for one conversation
+    
+    Messages that fall out of the recent window stay in the prompt until
+    the background refresh has folded them into the summary, so nothing
+    is dropped while a refresh is running.
+    """
+    
+    def __init__(self, recent_turns: int = None, token_budget: int = None,
+                 summarize: Callable[[str, List[BaseMessage], int], str] = None):
+        """
+        Args:
+            recent_turns: Number of recent turns (customer message and
+                everything after it) kept verbatim
+            token_budget: Maximum size of the summary in tokens
+            summarize: (summary, new_messages, token_budget) -> summary
+        """
+        self.recent_turns = settings.MEMORY_RECENT_TURNS if recent_turns is None else recent_turns
+        self.token_budget = settings.MEMORY_SUMMARY_TOKEN_BUDGET if token_budget is None else token_budget
+        self.summarize = summarize or llm_summary
+        
+        self.summary = ""
+        # Messages before this index are covered by the summary
+        self.summarized_upto = 0
+        self._lock = threading.Lock()
+        self._pending = None
+        self._latest: Optional[List[BaseMessage]] = None
+    
+    def _window_start(self, messages: List[BaseMessage]) -> int:
+        """Index of the first message of the last `recent_turns` turns"""
+        if self.recent_turns <= 0:
+            return len(messages)
+        seen = 0
+        for index in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[index], HumanMessage):
+                seen += 1
+                if seen == self.recent_turns:
+                    return index
+        return 0
+    
+    def context(self, messages: List[BaseMessage]) -> tuple:
+        """
+        Messages and summary to send for this turn
+        
+        Args:
+            messages: Full conversation, oldest first
+        
+        Returns:
+            (recent_messages, summary)
+        """
+        with self._lock:
+            # Everything not yet in the summary goes verbatim
+            start = min(self.summarized_upto, self._window_start(messages))
+            return messages[start:], self.summary
+    
+    def refresh(self, messages: List[BaseMessage]):
+        """
+        Fold messages that left the recent window into the summary, on the
+        background thread
+        
+        Args:
+            messages: Full conversation, oldest first
+        """
+        with self._lock:
+            self._latest = list(messages)
+            self._schedule()
+    
+    def _schedule(self):
+        # Caller holds the lock; one refresh runs at a time and picks up
+        # whatever has left the window since it was queued
+        if self._pending is not None or self._latest is None:
+            return
+        end = self._window_start(self._latest)
+        if end <= self.summarized_upto:
+            return
+        new_messages = self._latest[self.summarized_upto:end]
+        self._pending = _executor.submit(self._fold, self.summary, new_messages, end)
+    
+    def _fold(self, summary: str, new_messages: List[BaseMessage], end: int):
+        try:
+            try:
+                updated = self.summarize(summary, new_messages, self.token_budget)
+            except Exception as e:
+                # Always advance, or the same range would be resubmitted forever
+                print(f"Warning: Summary refresh failed, using extractive summary: {e}")
+                updated = extractive_summary(summary, new_messages, self.token_budget)
+            updated = trim_to_budget(updated, self.token_budget)
+            with self._lock:
+                self.summary = updated
+                self.summarized_upto = end
+        finally:
+            with self._lock:
+                self._pending = None
+                self._schedule()
+    
+    def wait(self, timeout: Optional[float] = None):
+        """Block until background refreshes finish (for tests and scripts)"""
+        while True:
+            with self._lock:
+                pending = self._pending
+            if pending is None:
+                return
+            pending.exception(timeout=timeout)
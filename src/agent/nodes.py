@@ -1,25 +1,49 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage
+import time
+
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 from src.config import settings
 from src.agent.state import AgentState
 from src.agent.prompts import get_chat_prompt
+from src.agent.llm_provider import get_chat_model
+from src.agent.prompt_cache import cached_prefix_text, get_prefix_cache, get_prompt_cache_stats
+from src.agent.response_cache import get_response_cache, response_cache_key
 from src.data_loaders.custom_loader import get_data_loader
-from src.utils.location_utils import find_nearby_locations
+from src.data_loaders.records import OrderRecord, field_reader
+from src.utils.location_utils import get_customer_best_store, precompute_nearest_stores
 from src.rag.retriever import get_retriever
+from src.rag.intent_classifier import get_intent_classifier
+from src.utils.context_parser import ContextParser
+from src.privacy.data_masking import content_text, to_plain
+
+# Search radius for a customer's nearest store
+STORE_SEARCH_RADIUS_KM = 10
+
+# Intents that need the store lookup, and ones answerable without RAG
+LOCATION_INTENTS = {"location_query"}
+NO_KNOWLEDGE_INTENTS = {"location_query", "greeting"}
 
 # Initialize Global Tools
 loader = get_data_loader()
+if settings.STORAGE_BACKEND.lower() == "json":
+    # Customers are already in memory, so resolve every saved location up front
+    precompute_nearest_stores(max_distance_km=STORE_SEARCH_RADIUS_KM)
 retriever = get_retriever()
-llm = ChatGoogleGenerativeAI(
-    model=settings.GEMINI_MODEL,
-    google_api_key=settings.GOOGLE_API_KEY,
-    temperature=settings.TEMPERATURE,
-    top_p=settings.TOP_P,
-    max_output_tokens=settings.MAX_TOKENS
-)
+intent_classifier = get_intent_classifier()
+# Gemini or the local fake, per settings.LLM_PROVIDER
+llm = get_chat_model()
+# Create the prompt prefix cache now, in the background, rather than on the first request
+if get_prefix_cache() is not None:
+    get_prefix_cache().warm()
 
 # Helper function to format order history
+# Reads compact order records from their slots, plain dicts via .get
+_order_fields = field_reader(
+    OrderRecord,
+    ("order_id", "status", "date", "items", "total"),
+    ("N/A", "Unknown", "N/A", (), "N/A")
+)
+
 def _format_order_history(orders: list, data_loader) -> str:
     if not orders:
         return ""
@@ -27,11 +51,7 @@ def _format_order_history(orders: list, data_loader) -> str:
     order_text = "**Customer Order History:**\n\n"
     
     for order in orders:
-        order_id = order.get("order_id", "N/A")
-        status = order.get("status", "Unknown")
-        date = order.get("date", "N/A")
-        items = order.get("items", [])
-        total = order.get("total", "N/A")
+        order_id, status, date, items, total = _order_fields(order)
         
         # Get product names
         item_names = [data_loader.get_product_name(item_id) for item_id in items]
@@ -44,23 +64,159 @@ def _format_order_history(orders: list, data_loader) -> str:
     
     return order_text
 
+def masks_pii(state: AgentState) -> bool:
+    """Whether this turn masks PII (the app's Privacy Shield, else the setting)"""
+    mask_pii = state.get("mask_pii")
+    return settings.ENABLE_PII_MASKING if mask_pii is None else bool(mask_pii)
+
+def customer_context_key(state: AgentState) -> str:
+    """Fingerprint of what user_info depends on: customer, data version and masking"""
+    return f"{state.get('user_id')}:{loader.data_version}:{masks_pii(state)}"
+
+def location_context_key(user_info) -> str:
+    """
+    Fingerprint of what location_context depends on: the customer's
+    coordinates, plus a time bucket since opening hours and wait times move
+    """
+    loc = (user_info or {}).get("location") or {}
+    bucket = int(time.time() // settings.LOCATION_CONTEXT_TTL_SEC)
+    return f"{loc.get('latitude')}:{loc.get('longitude')}:{bucket}"
+
+def customer_is_fresh(state: AgentState) -> bool:
+    """Whether user_info (from a checkpointed earlier turn) is still valid"""
+    keys = state.get("context_keys") or {}
+    return bool(state.get("user_info")) and keys.get("user_info") == customer_context_key(state)
+
+def location_is_fresh(state: AgentState) -> bool:
+    """Whether location_context (from a checkpointed earlier turn) is still valid"""
+    keys = state.get("context_keys") or {}
+    return (bool(state.get("location_context")) and customer_is_fresh(state)
+            and keys.get("location_context") == location_context_key(state.get("user_info")))
+
 def retrieve_customer_info(state: AgentState):
 
     """Node: Fetch customer profile based on ID."""
     
     user_id = state.get("user_id")
-    customer = loader.get_customer(user_id)
+    context_keys = {"user_info": customer_context_key(state)}
+    if masks_pii(state):
+        customer = loader.get_masked_customer(user_id)
+    else:
+        customer = loader.get_customer(user_id)
     
     if not customer:
-        return {"user_info": {"name": "Guest", "loyalty_points": 0, "preferences": {}, "location": {}, "order_history": []}}
+        return {"user_info": {"name": "Guest", "loyalty_points": 0, "preferences": {}, "location": {}, "order_history": []},
+                "context_keys": context_keys}
+    
+    # Ensuring customer has required fields for processing (without
+    # writing into the loader's record)
+    missing = {field: default for field, default in (("location", {}), ("order_history", [])) if field not in customer}
+    if missing:
+        customer = {**customer, **missing}
     
-    # Ensuring customer has required fields for processing
-    if "location" not in customer:
-        customer["location"] = {}
-    if "order_history" not in customer:
-        customer["order_history"] = []
+    if settings.CHECKPOINT_ENABLED:
+        # Checkpointed state is serialized, so hand over plain data
+        # rather than views of the loader's records
+        customer = to_plain(customer)
         
-    return {"user_info": customer}
+    return {"user_info": customer, "context_keys": context_keys}
+
+def _scan_intent(state: AgentState):
+    """Keyword intents and entities of the latest message (None if no messages)"""
+    messages = state.get("messages", [])
+    if not messages:
+        return None, None
+    last_message = messages[-1].content
+    return last_message, ContextParser.scan(last_message)
+
+def _intent_update(entities, predicted):
+    if entities is None:
+        return {"intent": "general_query", "entities": {"intents": ["general_query"]}}
+    if predicted is not None and predicted[0] != "general_query":
+        entities["intents"] = [predicted[0]]
+    return {"intent": entities["intents"][0], "entities": entities}
+
+async def aretrieve_customer_info(state: AgentState):
+    """Async retrieve_customer_info (in-memory or cached lookups, no I/O wait)"""
+    return retrieve_customer_info(state)
+
+def classify_intent(state: AgentState):
+    
+    """Node: Detect intent and entities of the latest user message."""
+    
+    last_message, entities = _scan_intent(state)
+    
+    predicted = None
+    if entities is not None and entities["intents"] == ["general_query"]:
+        # Keywords found nothing; fall back to the embedding classifier
+        # (the embedding is reused by retrieval later in the turn)
+        predicted = intent_classifier.classify(last_message)
+    
+    return _intent_update(entities, predicted)
+
+async def aclassify_intent(state: AgentState):
+    """Async classify_intent"""
+    last_message, entities = _scan_intent(state)
+    
+    predicted = None
+    if entities is not None and entities["intents"] == ["general_query"]:
+        predicted = await intent_classifier.aclassify(last_message)
+    
+    return _intent_update(entities, predicted)
+
+def _intents(state: AgentState) -> set:
+    entities = state.get("entities") or {}
+    return set(entities.get("intents") or [state.get("intent") or "general_query"])
+
+def needs_location(state: AgentState) -> bool:
+    """Whether the turn is about stores or locations"""
+    return bool(_intents(state) & LOCATION_INTENTS)
+
+def needs_knowledge(state: AgentState) -> bool:
+    """Whether the turn needs order history or knowledge base context"""
+    return not _intents(state) <= NO_KNOWLEDGE_INTENTS
+
+def _find_customer_order(user_info, order_id: str):
+    if not order_id:
+        return None
+    for order in user_info.get("order_history") or []:
+        if str(order.get("order_id", "")).upper() == order_id.upper():
+            return order
+    return None
+
+def can_answer_order_status(state: AgentState) -> bool:
+    """A plain order-status question about one of the customer's own orders"""
+    if _intents(state) - {"greeting"} != {"order_status"}:
+        return False
+    order_id = (state.get("entities") or {}).get("order_id")
+    return _find_customer_order(state.get("user_info", {}), order_id) is not None
+
+def answer_order_status(state: AgentState):
+    
+    """Node: Templated order-status answer, no LLM call."""
+    
+    user_info = state.get("user_info", {})
+    order = _find_customer_order(user_info, state["entities"]["order_id"])
+    
+    first_name = user_info.get("first_name") or (user_info.get("name") or "there").split()[0]
+    item_names = [loader.get_product_name(item_id) for item_id in order.get("items", [])]
+    
+    response = (
+        f"Hi {first_name}! Your order {order.get('order_id')} from {order.get('date', 'N/A')} "
+        f"is currently **{str(order.get('status', 'unknown')).upper()}**.\n\n"
+        f"Items: {', '.join(item_names) or 'N/A'}\n"
+        f"Total: ₹{order.get('total', 'N/A')}"
+    )
+    
+    return {
+        "final_response": response,
+        "order_context": _format_order_history([order], loader),
+        "messages": [AIMessage(content=response)]
+    }
+
+async def aanswer_order_status(state: AgentState):
+    """Async answer_order_status"""
+    return answer_order_status(state)
 
 def check_location_context(state: AgentState):
     
@@ -79,18 +235,15 @@ def check_location_context(state: AgentState):
         }}
     
     try:
-        # Find nearest stores
-        nearby = find_nearby_locations(
-            user_lat=cust_loc.get("latitude"),
-            user_lon=cust_loc.get("longitude"),
-            max_distance_km=10
-        )
+        # Pick the best nearby store: close, open now, short wait
+        store = get_customer_best_store(user_info, max_distance_km=STORE_SEARCH_RADIUS_KM)
         
-        if nearby:
-            store = nearby[0]
+        if store:
             context = {
                 "nearest_store": store.get('name', 'Unknown'),
                 "distance": round(store.get('distance_km', 0), 2),
+                "open_now": store.get('is_open_now', True),
+                "wait_time_min": store.get('current_wait_time_min', 'N/A'),
                 "city": cust_loc.get("city", "Unknown"),
                 "store_lat": store['location']['latitude'],
                 "store_lon": store['location']['longitude']
@@ -109,7 +262,25 @@ def check_location_context(state: AgentState):
             "city": cust_loc.get("city", "Unknown")
         }
         
-    return {"location_context": context}
+    return {"location_context": context, "context_keys": {"location_context": location_context_key(user_info)}}
+
+async def acheck_location_context(state: AgentState):
+    """Async check_location_context (vectorized in-memory search)"""
+    return check_location_context(state)
+
+def _is_order_keyword_query(message: str) -> bool:
+    order_keywords = ["order", "track", "where is", "status", "deliver", "shipped", "transit"]
+    message_lower = message.lower()
+    return any(keyword in message_lower for keyword in order_keywords)
+
+def _knowledge_update(user_info, rag_context: str, is_order_query: bool):
+    order_context = ""
+    if is_order_query and user_info.get("order_history"):
+        orders = user_info.get("order_history", [])
+        if orders:
+            order_context = _format_order_history(orders, loader)
+    
+    return {"rag_context": rag_context, "order_context": order_context}
 
 def retrieve_knowledge(state: AgentState):
     """Node: RAG Retrieval based on the latest user message."""
@@ -120,25 +291,38 @@ def retrieve_knowledge(state: AgentState):
         return {"rag_context": "", "order_context": ""}
     
     last_message = messages[-1].content
-    last_message_lower = last_message.lower()
-    
-    order_keywords = ["order", "track", "where is", "status", "deliver", "shipped", "transit"]
-    is_order_query = any(keyword in last_message_lower for keyword in order_keywords)
-    
-    order_context = ""
-    if is_order_query and user_info.get("order_history"):
-        orders = user_info.get("order_history", [])
-        if orders:
-            order_context = _format_order_history(orders, loader)
     
     # Retrieve docs from RAG
     result = retriever.retrieve_context(last_message)
-    rag_context = result["formatted_context"]
     
-    return {"rag_context": rag_context, "order_context": order_context}
+    is_order_query = _is_order_keyword_query(last_message)
+    if not is_order_query:
+        # Reuses the query embedding retrieval just computed
+        predicted = intent_classifier.classify(last_message)
+        is_order_query = predicted is not None and predicted[0] == "order_status"
+    
+    return _knowledge_update(user_info, result["formatted_context"], is_order_query)
 
-def generate_response(state: AgentState):
+async def aretrieve_knowledge(state: AgentState):
+    """Async retrieve_knowledge"""
+    messages = state.get("messages", [])
+    user_info = state.get("user_info", {})
     
+    if not messages:
+        return {"rag_context": "", "order_context": ""}
+    
+    last_message = messages[-1].content
+    
+    result = await retriever.aretrieve_context(last_message)
+    
+    is_order_query = _is_order_keyword_query(last_message)
+    if not is_order_query:
+        predicted = await intent_classifier.aclassify(last_message)
+        is_order_query = predicted is not None and predicted[0] == "order_status"
+    
+    return _knowledge_update(user_info, result["formatted_context"], is_order_query)
+
+def _prompt_inputs(state: AgentState):
     user_info = state.get("user_info", {})
     loc_ctx = state.get("location_context", {})
     rag_ctx = state.get("rag_context", "")
@@ -150,33 +334,112 @@ def generate_response(state: AgentState):
     if order_ctx:
         combined_context = order_ctx + "\n\n" + rag_ctx
     
-    prompt_inputs = {
-        "user_name": user_info.get("name", "Guest"),
+    return {
+        # The masked profile's name carries a redaction marker; address the
+        # customer by first name
+        "user_name": user_info.get("first_name") or user_info.get("name", "Guest"),
         "loyalty_points": user_info.get("loyalty_points", 0),
         "preferences": str(user_info.get("preferences", {})),
         "current_location": user_info.get("location", {}).get("address", "Unknown"),
         "nearest_store": loc_ctx.get("nearest_store", "Unknown"),
         "distance": loc_ctx.get("distance", "N/A"),
         "rag_context": combined_context,
+        "conversation_summary": state.get("conversation_summary") or "None",
         "messages": messages
     }
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed message chunk"""
+    return content_text(getattr(chunk, "content", chunk))
+
+ERROR_RESPONSE = "I apologize, but I encountered an error processing your request. Please try again."
+
+def _response_update(content: str):
+    # Create response object
+    ai_response = AIMessage(content=content)
+    
+    return {
+        "final_response": content,
+        "error": "",
+        "messages": [ai_response]  
+    }
+
+def _error_update(e: Exception):
+    print(f"Error generating response: {e}")
+    error_response = AIMessage(content=ERROR_RESPONSE)
+    return {
+        "final_response": "Error",
+        "error": str(e) or type(e).__name__,
+        "messages": [error_response]
+    }
+
+def _full_prompt(inputs: dict):
+    """The whole prompt as sent inline: the stable prefix, then the rendered chat prompt"""
+    return [SystemMessage(content=cached_prefix_text())] + get_chat_prompt().invoke(inputs).to_messages()
+
+def _prepare_generation(inputs: dict, messages):
+    """
+    The model to call, the messages to send it, and the cached-prefix token estimate
+
+    With a live cached-content handle the prefix is served from the cache
+    and left out of the messages; otherwise the full prompt goes inline.
+    """
+    prefix_cache = get_prefix_cache()
+    handle = prefix_cache.handle() if prefix_cache else None
+    if handle is None:
+        return llm, messages, 0
+    suffix = get_chat_prompt(cached_prefix=True).invoke(inputs).to_messages()
+    return prefix_cache.attach(llm, handle), suffix, prefix_cache.cached_estimate(handle)
+
+def _cached_response(messages):
+    """(cache, key, cached response) for the rendered prompt"""
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return None, None, None
+    key = response_cache_key(messages)
+    return response_cache, key, response_cache.get(key)
+
+def _finish_generation(message, messages, cached_estimate: int, response_cache=None, key=None):
+    get_prompt_cache_stats().record_usage(getattr(message, "usage_metadata", None), messages, cached_estimate)
+    content = chunk_text(message) if message is not None else ""
+    if response_cache is not None and content:
+        response_cache.put(key, content)
+    return _response_update(content)
+
+def generate_response(state: AgentState):
     
     try:
-        # Generate
-        chain = get_chat_prompt() | llm
-        response = chain.invoke(prompt_inputs)
+        inputs = _prompt_inputs(state)
+        messages = _full_prompt(inputs)
+        # Identical prompts are answered from the response cache, before
+        # any prefix cache work
+        response_cache, key, cached = _cached_response(messages)
+        if cached is not None:
+            return _response_update(cached)
         
-        # Create response object
-        ai_response = AIMessage(content=response.content)
+        # Generate (streamed, so the graph's "messages" stream sees each
+        # token; the chunks add up to the full message with usage metadata)
+        model, sent, cached_estimate = _prepare_generation(inputs, messages)
+        message = None
+        for chunk in model.stream(sent):
+            message = chunk if message is None else message + chunk
+        return _finish_generation(message, sent, cached_estimate, response_cache, key)
+    except Exception as e:
+        return _error_update(e)
+
+async def agenerate_response(state: AgentState):
+    """Async generate_response"""
+    try:
+        inputs = _prompt_inputs(state)
+        messages = _full_prompt(inputs)
+        response_cache, key, cached = _cached_response(messages)
+        if cached is not None:
+            return _response_update(cached)
         
-        return {
-            "final_response": response.content,
-            "messages": [ai_response]  
-        }
+        model, sent, cached_estimate = _prepare_generation(inputs, messages)
+        message = None
+        async for chunk in model.astream(sent):
+            message = chunk if message is None else message + chunk
+        return _finish_generation(message, sent, cached_estimate, response_cache, key)
     except Exception as e:
-        print(f"Error generating response: {e}")
-        error_response = AIMessage(content="I apologize, but I encountered an error processing your request. Please try again.")
-        return {
-            "final_response": "Error",
-            "messages": [error_response]
-        }
\ No newline at end of file
+        return _error_update(e)
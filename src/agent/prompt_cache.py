@@ -0,0 +1,280 @@
+"""
+Prompt prefix caching
+An optional cached-content handle for the stable part of the prompt (the
+instructions plus the full policy and FAQ reference), and counters of
+cached versus uncached input tokens per model call
+"""
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.config import settings
+from src.agent.prompts import STATIC_PROMPT
+from src.agent.memory import estimate_tokens
+from src.data_loaders.custom_loader import get_data_loader, register_snapshot_index
+
+
+def knowledge_reference(policies: List[Dict], faqs: List[Dict]) -> str:
+    """Policies and FAQs as one reference block"""
+    lines = ["### STORE POLICIES & FAQ REFERENCE:"]
+    for policy in policies:
+        lines.append(f"\n**{policy.get('title', '')}**\n{policy.get('content', '')}")
+        for section in policy.get('sections', []):
+            lines.append(f"- {section.get('heading', '')}: {section.get('details', '')}")
+    lines.append("\n**Frequently Asked Questions**")
+    for faq in faqs:
+        lines.append(f"Q: {faq.get('question', '')}\nA: {faq.get('answer', '')}")
+    return "\n".join(lines)
+
+
+def cached_prefix_text() -> str:
+    """
+    Stable prompt prefix: STATIC_PROMPT plus the whole policy and FAQ
+    reference
+
+    Every request starts with it, sent inline or as cached content.
+    Instructions alone are below the provider's minimum cacheable size;
+    the knowledge base is just as stable and brings it over.
+    """
+    return get_data_loader().index('prompt_prefix')
+
+
+# Built with each data snapshot, and rebuilt only when policies or FAQs reload
+register_snapshot_index(
+    'prompt_prefix', ('policies', 'faqs'),
+    lambda backend, indexes: STATIC_PROMPT + "\n" + knowledge_reference(backend.all_policies(), backend.all_faqs())
+)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def estimate_message_tokens(messages: List[BaseMessage]) -> int:
+    """Rough token count of a rendered prompt"""
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+class PromptCacheStats:
+    """Thread-safe totals of cached and uncached input tokens"""
+
+    def __init__(self, history_size: int = 100):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        # (input_tokens, cached_tokens) of the most recent calls
+        self.recent = deque(maxlen=history_size)
+
+    def record(self, input_tokens: int, cached_tokens: int = 0):
+        """
+        Record one model call
+
+        Args:
+            input_tokens: Total input tokens, cached ones included
+            cached_tokens: Input tokens served from a cache
+        """
+        cached_tokens = min(cached_tokens, input_tokens)
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached_tokens
+            self.recent.append((input_tokens, cached_tokens))
+
+    def record_usage(self, usage: Optional[Dict], messages: List[BaseMessage],
+                     cached_estimate: int = 0):
+        """
+        Record a call from the model's usage metadata, or estimate it from
+        the rendered messages when the model reports none
+
+        Args:
+            usage: AIMessage.usage_metadata (may be None)
+            messages: Rendered prompt messages
+            cached_estimate: Tokens known to come from a cached prefix
+        """
+        if usage and usage.get("input_tokens"):
+            details = usage.get("input_token_details") or {}
+            self.record(usage["input_tokens"], details.get("cache_read") or 0)
+        else:
+            self.record(estimate_message_tokens(messages) + cached_estimate, cached_estimate)
+
+    def snapshot(self) -> Dict:
+        """Totals, with the cached share of input tokens"""
+        with self._lock:
+            uncached = self.input_tokens - self.cached_tokens
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cached_tokens": self.cached_tokens,
+                "uncached_tokens": uncached,
+                "cached_ratio": round(self.cached_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            }
+
+
+class GeminiPrefixCache:
+    """
+    Explicit Gemini cached content holding cached_prefix_text()
+
+    The cache is created on a background thread, started by warm() at
+    startup and again when the TTL runs out or the prefix changes; calls
+    send the full prompt until it is ready, so no request waits on it. A
+    prefix below PROMPT_CACHE_MIN_TOKENS is never sent; a failed creation
+    is retried with exponential backoff.
+    """
+
+    def __init__(self, ttl_sec: int = None):
+        self.ttl_sec = ttl_sec or settings.PROMPT_CACHE_TTL_SEC
+        self._lock = threading.Lock()
+        self._name = None
+        self._name_digest = None
+        self._expires_at = 0.0
+        self._creating = False
+        self._failures = 0
+        self._retry_at = 0.0
+        self._too_small_digest = None
+
+    def _create(self, prefix: str) -> str:
+        from google import genai
+        from google.genai import types
+
+        client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+        cache = client.caches.create(
+            model=settings.GEMINI_MODEL,
+            config=types.CreateCachedContentConfig(
+                display_name="awarex-static-prompt",
+                system_instruction=prefix,
+                ttl=f"{self.ttl_sec}s",
+            ),
+        )
+        return cache.name
+
+    def _create_in_background(self, prefix: str, digest: str):
+        try:
+            name = self._create(prefix)
+        except Exception as e:
+            with self._lock:
+                self._creating = False
+                self._failures += 1
+                delay = min(settings.PROMPT_CACHE_RETRY_MAX_SEC, 2 ** (self._failures - 1) * 5)
+                self._retry_at = time.time() + delay
+            print(f"Warning: Could not create prompt cache, sending the full prompt (retry in {delay:.0f}s): {e}")
+            return
+        with self._lock:
+            self._creating = False
+            self._name = name
+            self._name_digest = digest
+            self._expires_at = time.time() + self.ttl_sec
+            self._failures = 0
+
+    def handle(self) -> Optional[str]:
+        """
+        Name of a live cached content, or None to send the full prompt
+
+        Never blocks: a missing or stale cache is (re)created in the
+        background.
+        """
+        prefix = cached_prefix_text()
+        digest = _digest(prefix)
+        now = time.time()
+        with self._lock:
+            # Renew a little early so no request races the expiry
+            if self._name is not None and self._name_digest == digest and now < self._expires_at - 30:
+                return self._name
+            if self._creating or digest == self._too_small_digest or now < self._retry_at:
+                return None
+            if estimate_tokens(prefix) < settings.PROMPT_CACHE_MIN_TOKENS:
+                print(f"Warning: Prompt prefix is below {settings.PROMPT_CACHE_MIN_TOKENS} tokens, "
+                      f"too small for cached content; sending the full prompt")
+                self._too_small_digest = digest
+                return None
+            self._creating = True
+        threading.Thread(target=self._create_in_background, args=(prefix, digest),
+                         name="prompt-cache", daemon=True).start()
+        return None
+
+    def warm(self):
+        """Start creating the cache ahead of the first request"""
+        self.handle()
+
+    def attach(self, model, handle: str):
+        """Model bound to the cached content"""
+        return model.bind(cached_content=handle)
+
+    def cached_estimate(self, handle: Optional[str]) -> int:
+        # Gemini reports cached tokens in the usage metadata
+        return 0
+
+
+class LocalPrefixCache:
+    """
+    Local stand-in for GeminiPrefixCache, for tests and offline runs
+
+    Hands out a handle named after the prefix hash and puts the prefix back
+    in front of the prompt before the model sees it, as the provider would,
+    so the cached code path runs against any chat model.
+    """
+
+    def __init__(self, ttl_sec: int = None):
+        self.ttl_sec = ttl_sec or settings.PROMPT_CACHE_TTL_SEC
+        self.creations = 0
+        self._lock = threading.Lock()
+        self._name = None
+        self._prefix = ""
+        self._expires_at = 0.0
+
+    def handle(self) -> Optional[str]:
+        prefix = cached_prefix_text()
+        with self._lock:
+            if self._name is None or prefix != self._prefix or time.time() >= self._expires_at:
+                self._prefix = prefix
+                self._name = f"cachedContents/local-{_digest(prefix)}"
+                self._expires_at = time.time() + self.ttl_sec
+                self.creations += 1
+            return self._name
+
+    def warm(self):
+        self.handle()
+
+    def attach(self, model, handle: str):
+        prefix = SystemMessage(content=self._prefix)
+
+        def restore_prefix(messages):
+            return [prefix] + list(messages)
+
+        return RunnableLambda(restore_prefix) | model
+
+    def cached_estimate(self, handle: Optional[str]) -> int:
+        return estimate_tokens(self._prefix) if handle else 0
+
+
+_prompt_cache_stats = PromptCacheStats()
+_prefix_cache = None
+_prefix_cache_lock = threading.Lock()
+
+
+def get_prompt_cache_stats() -> PromptCacheStats:
+    """Process-wide prompt token counters"""
+    return _prompt_cache_stats
+
+
+def get_prefix_cache():
+    """
+    Prefix cache selected by PROMPT_CACHE_MODE
+
+    Returns:
+        GeminiPrefixCache ("gemini"), LocalPrefixCache ("local"), or None
+        ("none": rely on the provider's implicit prefix caching)
+    """
+    global _prefix_cache
+    mode = settings.PROMPT_CACHE_MODE.lower()
+    if mode not in ("gemini", "local"):
+        return None
+    with _prefix_cache_lock:
+        if _prefix_cache is None:
+            _prefix_cache = GeminiPrefixCache() if mode == "gemini" else LocalPrefixCache()
+        return _prefix_cache
@@ -1,32 +1,70 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
-SYSTEM_PROMPT = """You are the AI Customer Experience Agent for 'awarex', a premium service provider.
+# The prompt is laid out from most to least stable so providers can reuse
+# the longest possible prefix: instructions shared by every call, then the
+# customer block (same for a whole conversation), then the per-turn block
+
+STATIC_PROMPT = """You are the AI Customer Experience Agent for 'awarex', a premium service provider.
 
 Your Goal: Provide hyper-personalized, helpful, and warm support.
 
-### CURRENT USER CONTEXT:
+The customer profile, earlier conversation summary, nearest store and retrieved knowledge follow these instructions.
+
+### INSTRUCTIONS:
+1. **Be Personal:** Use the user's name. Acknowledge their loyalty status if high (>500 points).
+2. **Order Tracking:** If asked about orders, refer to the "Customer Order History" section. Provide specific details like order ID, status, items, and date.
+3. **Location Aware:** If they ask about stores, refer to the nearest one listed.
+4. **Smart Selling:** If they seem hungry/thirsty, suggest items based on their 'Preferences' and the 'Knowledge Base'.
+5. **Policy Enforcer:** If they ask for refunds/returns, strictly follow the policies in the Knowledge Base.
+6. **Tone:** Warm, professional, and efficient.
+
+Answer the user's query based on the context below. Use specific order details when available.
+"""
+
+CUSTOMER_PROMPT = """### CURRENT USER CONTEXT:
 - **Name:** {user_name}
 - **Loyalty Status:** {loyalty_points} points
 - **Preferences:** {preferences}
 - **Current Location:** {current_location}
-- **Nearest Store:** {nearest_store} (Distance: {distance}km)
+"""
+
+TURN_PROMPT = """### NEAREST STORE:
+{nearest_store} (Distance: {distance}km)
+
+### EARLIER CONVERSATION SUMMARY:
+{conversation_summary}
 
 ### CUSTOMER DATA & KNOWLEDGE BASE:
 {rag_context}
+"""
 
-### INSTRUCTIONS:
-1. **Be Personal:** Use the user's name. Acknowledge their loyalty status if high (>500 points).
-2. **Order Tracking:** If asked about orders, refer to the "Customer Order History" section above. Provide specific details like order ID, status, items, and date.
-3. **Location Aware:** If they ask about stores, refer to the nearest one listed above.
-4. **Smart Selling:** If they seem hungry/thirsty, suggest items based on their 'Preferences' and the 'Knowledge Base'.
-5. **Policy Enforcer:** If they ask for refunds/returns, strictly follow the policies in the Knowledge Base.
-6. **Tone:** Warm, professional, and efficient.
+# Kept for callers that want the whole system prompt as one template
+SYSTEM_PROMPT = STATIC_PROMPT + "\n" + CUSTOMER_PROMPT + "\n" + TURN_PROMPT
 
-Answer the user's query based on the above context. Use specific order details when available.
-"""
 
-def get_chat_prompt():
+def get_chat_prompt(cached_prefix: bool = False):
+    """
+    Chat prompt for the response node, minus the stable prefix
+
+    The prefix (STATIC_PROMPT with the policy and FAQ reference, see
+    prompt_cache.cached_prefix_text) goes in front of every request, inline
+    or as provider-side cached content, so all modes send the same text.
+
+    Args:
+        cached_prefix: Layout for a request whose prefix is cached content:
+            the customer and turn blocks go in a leading human message,
+            since Gemini rejects a system instruction alongside it.
+
+    Returns:
+        ChatPromptTemplate
+    """
+    if cached_prefix:
+        return ChatPromptTemplate.from_messages([
+            ("human", CUSTOMER_PROMPT + "\n" + TURN_PROMPT),
+            MessagesPlaceholder(variable_name="messages"),
+        ])
     return ChatPromptTemplate.from_messages([
-        ("system", SYSTEM_PROMPT),
+        ("system", CUSTOMER_PROMPT),
+        ("system", TURN_PROMPT),
         MessagesPlaceholder(variable_name="messages"),
-    ])
\ No newline at end of file
+    ])
@@ -0,0 +1,149 @@
+"""
+Exact-match LLM response cache
+Responses are keyed by a hash of the fully rendered prompt and the model
+parameters, held in an in-memory LRU and persisted to a local SQLite file
+so replays and test runs skip the model entirely
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from langchain_core.messages import BaseMessage
+
+from src.config import settings
+
+
+def response_cache_key(messages: List[BaseMessage]) -> str:
+    """
+    Hash of the rendered prompt and everything else that shapes the answer
+
+    Args:
+        messages: The whole prompt, stable prefix included, whether it is
+            sent inline or as cached content
+
+    Returns:
+        Hex digest
+    """
+    payload = {
+        "provider": settings.LLM_PROVIDER,
+        "model": settings.GEMINI_MODEL,
+        "temperature": settings.TEMPERATURE,
+        "top_p": settings.TOP_P,
+        "max_tokens": settings.MAX_TOKENS,
+        "messages": [[message.type, message.content] for message in messages],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU in front of a SQLite table, with a TTL per entry"""
+
+    def __init__(self, path=None, max_size: int = None, ttl_sec: float = None):
+        """
+        Args:
+            path: SQLite file (None keeps the cache in memory only)
+            max_size: Entries kept in the in-memory LRU
+            ttl_sec: Seconds an entry stays valid
+        """
+        self.max_size = settings.RESPONSE_CACHE_SIZE if max_size is None else max_size
+        self.ttl_sec = settings.RESPONSE_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+        self.hits = 0
+        self.misses = 0
+        # key -> (response, expires_at)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for a key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, *entry)
+
+            if entry is not None and entry[1] <= now:
+                self._memory.pop(key, None)
+                if self._conn is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, response: str):
+        """Store a response under a key"""
+        expires_at = time.time() + self.ttl_sec
+        with self._lock:
+            self._remember(key, response, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, expires_at) VALUES (?, ?, ?)",
+                    (key, response, expires_at)
+                )
+                self._conn.commit()
+
+    def clear(self):
+        """Drop every entry, in memory and on disk"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._memory)}
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Shared response cache, or None when caching does not apply
+
+    Caching is off unless RESPONSE_CACHE_ENABLED is set, and is bypassed
+    at a non-zero temperature (where a repeat call would give a different
+    answer) unless RESPONSE_CACHE_ALLOW_NONZERO_TEMPERATURE is also set.
+    """
+    global _response_cache
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    if settings.TEMPERATURE != 0 and not settings.RESPONSE_CACHE_ALLOW_NONZERO_TEMPERATURE:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(settings.RESPONSE_CACHE_PATH)
+        return _response_cache
@@ -1,19 +1,37 @@
-import operator
 from typing import Annotated, TypedDict, List, Dict, Any
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
+
+
+def merge_dicts(left: Dict, right: Dict) -> Dict:
+    """Reducer: update the stored dict key by key"""
+    return {**(left or {}), **(right or {})}
+
 
 class AgentState(TypedDict):
     """
     The state of the agent execution.
     """
-    messages: Annotated[List[BaseMessage], operator.add]
+    # Appends; a checkpointed session replaces it each turn with
+    # RemoveMessage(REMOVE_ALL_MESSAGES) followed by the recent window
+    messages: Annotated[List[BaseMessage], add_messages]
+    conversation_summary: str
     user_id: str
+    # Privacy Shield for this turn (None: settings.ENABLE_PII_MASKING)
+    mask_pii: bool
     
     user_info: Dict[str, Any]      
     location_context: Dict[str, Any]
+    # Fingerprints of the inputs user_info and location_context were built
+    # from; a checkpointed session reuses them until these change
+    context_keys: Annotated[Dict[str, str], merge_dicts]
     rag_context: str
     order_context: str               
     
     intent: str
+    entities: Dict[str, Any]
     
-    final_response: str
\ No newline at end of file
+    final_response: str
+    # Set when response generation failed (possibly after some tokens
+    # were already streamed)
+    error: str
\ No newline at end of file
@@ -17,7 +17,15 @@ class Settings:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
     
     # Model Configuration
+    # LLM_PROVIDER: "gemini", or "fake" for a deterministic local model with
+    # a latency profile ("instant", "fast", "realistic", "slow")
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+    FAKE_LLM_PROFILE = os.getenv("FAKE_LLM_PROFILE", "realistic")
+    FAKE_LLM_RESPONSE_TOKENS = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "40"))
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    # EMBEDDING_PROVIDER: "gemini", or "fake" for deterministic hashed
+    # embeddings that need no API key or network
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
     
     # Application Settings
@@ -29,6 +37,22 @@ class Settings:
     MAX_TOKENS = 1024
     TOP_P = 0.95
     
+    # Prompt prefix caching: "none" (provider implicit caching only),
+    # "gemini" (explicit cached content) or "local" (offline stand-in)
+    PROMPT_CACHE_MODE = os.getenv("PROMPT_CACHE_MODE", "none")
+    PROMPT_CACHE_TTL_SEC = int(os.getenv("PROMPT_CACHE_TTL_SEC", "3600"))
+    # Gemini's minimum cached-content size, and the cap on retry backoff
+    PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+    PROMPT_CACHE_RETRY_MAX_SEC = float(os.getenv("PROMPT_CACHE_RETRY_MAX_SEC", "600"))
+    
+    # Exact-match response cache (opt-in; bypassed at non-zero temperature
+    # unless allowed)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "False").lower() == "true"
+    RESPONSE_CACHE_ALLOW_NONZERO_TEMPERATURE = os.getenv("RESPONSE_CACHE_ALLOW_NONZERO_TEMPERATURE", "False").lower() == "true"
+    RESPONSE_CACHE_PATH = Path(os.getenv("RESPONSE_CACHE_PATH", str(DATA_DIR / "response_cache.db")))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    RESPONSE_CACHE_TTL_SEC = float(os.getenv("RESPONSE_CACHE_TTL_SEC", "86400"))
+    
     # RAG Configuration
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 50
@@ -37,6 +61,12 @@ class Settings:
     # Vector Store
     VECTORSTORE_PATH = DATA_DIR / "vectorstore"
     FAISS_INDEX_NAME = "customer_support_index"
+    QUERY_EMBEDDING_CACHE_SIZE = 256
+    
+    # Intent Classification (nearest centroid of example embeddings)
+    INTENT_EXAMPLES_FILE = DATA_DIR / "intent_examples.json"
+    INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.6"))
+    INTENT_CACHE_SIZE = 1024
     
     # Data Files
     CUSTOMERS_FILE = DATA_DIR / "customers.json"
@@ -46,6 +76,25 @@ class Settings:
     POLICIES_FILE = DATA_DIR / "policies.json"
     FAQS_FILE = DATA_DIR / "faqs.json"
     
+    # Storage Backend ("json" or "sqlite")
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+    SQLITE_DB_PATH = Path(os.getenv("SQLITE_DB_PATH", str(DATA_DIR / "groundtruth.db")))
+    CUSTOMER_CACHE_SIZE = int(os.getenv("CUSTOMER_CACHE_SIZE", "1024"))
+    COMPACT_RECORDS = os.getenv("COMPACT_RECORDS", "False").lower() == "true"
+    
+    # Hot Reload (JSON backend only)
+    HOT_RELOAD_ENABLED = os.getenv("HOT_RELOAD_ENABLED", "False").lower() == "true"
+    HOT_RELOAD_INTERVAL_SEC = float(os.getenv("HOT_RELOAD_INTERVAL_SEC", "5"))
+    
+    # Conversation Memory (recent turns verbatim + rolling summary)
+    MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "6"))
+    MEMORY_SUMMARY_TOKEN_BUDGET = int(os.getenv("MEMORY_SUMMARY_TOKEN_BUDGET", "400"))
+    
+    # Session Checkpointing (agent state persisted per session/thread)
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "False").lower() == "true"
+    CHECKPOINT_DB_PATH = Path(os.getenv("CHECKPOINT_DB_PATH", str(DATA_DIR / "checkpoints.db")))
+    LOCATION_CONTEXT_TTL_SEC = int(os.getenv("LOCATION_CONTEXT_TTL_SEC", "300"))
+    
     # Privacy Settings
     ENABLE_PII_MASKING = True
     PII_ENTITIES = ["PHONE_NUMBER", "EMAIL_ADDRESS", "CREDIT_CARD", "IP_ADDRESS"]
@@ -58,7 +107,16 @@ class Settings:
         "country": "India"
     }
     
-    # Business Hours
+    # Optional place-name dataset (CSV or JSON) for the offline gazetteer
+    GAZETTEER_FILE = Path(os.getenv("GAZETTEER_FILE", str(DATA_DIR / "gazetteer.csv")))
+    
+    # Store Ranking: score = distance_km + wait_min * RANK_KM_PER_WAIT_MIN,
+    # plus RANK_CLOSED_PENALTY_KM when the store is closed
+    RANK_KM_PER_WAIT_MIN = 0.1
+    RANK_CLOSED_PENALTY_KM = 100.0
+    RANKING_CANDIDATES = 10
+    
+    # Business Hours (default for stores without their own hours)
     BUSINESS_HOURS = {
         "monday": "09:00-21:00",
         "tuesday": "09:00-21:00",
@@ -94,6 +152,7 @@ class Settings:
             "embedding_model": cls.EMBEDDING_MODEL,
             "debug_mode": cls.DEBUG_MODE,
             "max_search_radius": cls.MAX_SEARCH_RADIUS_KM,
+            "storage_backend": cls.STORAGE_BACKEND,
             "pii_masking": cls.ENABLE_PII_MASKING,
             "api_key_set": bool(cls.GOOGLE_API_KEY)
         }
@@ -1,89 +1,211 @@
-import json
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from src.config import settings
+from src.data_loaders.hot_reload import DataFileWatcher, DataSnapshot
+from src.data_loaders.promotion_index import PromotionIndex
+from src.data_loaders.storage import (
+    ReloadableBackend,
+    StorageBackend,
+    create_storage_backend,
+    load_json_file,
+)
+from src.privacy.data_masking import MaskedView, PIIMasker
+
+# Derived indexes kept on every snapshot: name -> (collections read,
+# build(backend, indexes)). Builders run in registration order and see the
+# indexes built before them, so one index can depend on another
+IndexBuilder = Callable[[StorageBackend, Dict[str, object]], object]
+_index_builders: Dict[str, Tuple[Tuple[str, ...], IndexBuilder]] = {}
 
 
 class CustomerDataLoader:
     """Load and manage customer data"""
     
-    def __init__(self):
-        self.customers = []
-        self.products = []
-        self.promotions = []
-        self.locations = []
-        self.policies = []
-        self.faqs = []
+    def __init__(self, backend: StorageBackend = None):
+        self._backend_override = backend
+        self._swap_lock = threading.Lock()
+        # Guards the per-snapshot masked customer caches
+        self._masked_lock = threading.Lock()
+        self._snapshot = None
         self.load_all_data()
     
     def load_all_data(self):
         """Load all data files"""
-        self.customers = self._load_json(settings.CUSTOMERS_FILE)
-        self.products = self._load_json(settings.PRODUCTS_FILE)
-        self.promotions = self._load_json(settings.PROMOTIONS_FILE)
-        self.locations = self._load_json(settings.LOCATIONS_FILE)
-        self.policies = self._load_json(settings.POLICIES_FILE)
-        self.faqs = self._load_json(settings.FAQS_FILE)
+        backend = self._backend_override or create_storage_backend()
+        version = self._snapshot.version + 1 if self._snapshot else 0
+        self._snapshot = DataSnapshot(
+            backend=backend,
+            promotion_index=PromotionIndex(backend.all_promotions()),
+            version=version,
+            indexes=self._build_indexes(backend, {})
+        )
+    
+    @staticmethod
+    def _build_indexes(backend: StorageBackend, indexes: Dict[str, object],
+                       changed: str = None) -> Dict[str, object]:
+        """
+        Build the registered indexes for a backend
+        
+        Args:
+            backend: Backend the indexes are built from
+            indexes: Indexes of the previous snapshot, kept where unaffected
+            changed: Collection that changed (None rebuilds everything)
+        
+        Returns:
+            New name -> index mapping
+        """
+        indexes = dict(indexes)
+        for name, (collections, build) in list(_index_builders.items()):
+            if changed is None or changed in collections or name not in indexes:
+                indexes[name] = build(backend, indexes)
+        return indexes
+    
+    def build_index(self, name: str):
+        """Build one registered index into the current snapshot"""
+        collections, build = _index_builders[name]
+        with self._swap_lock:
+            snapshot = self._snapshot
+            snapshot.indexes[name] = build(snapshot.backend, dict(snapshot.indexes))
+    
+    def reload_collection(self, name: str, records: List[Dict]):
+        """
+        Replace one collection and swap in a new snapshot
+        
+        Indexes that read the collection are rebuilt before the swap, so
+        readers never see a half-built view and requests never rebuild
+        them; every other index carries over unchanged.
+        
+        Args:
+            name: Collection name (customers, products, promotions, ...)
+            records: Freshly parsed records for the collection
+        
+        Raises:
+            TypeError: If the backend cannot be reloaded in memory (SQLite
+                data is updated by re-running the import)
+        """
+        with self._swap_lock:
+            current = self._snapshot
+            if not isinstance(current.backend, ReloadableBackend):
+                raise TypeError(f"{type(current.backend).__name__} does not support hot reload")
+            backend = current.backend.with_collection(name, records)
+            promotion_index = current.promotion_index
+            if name == 'promotions':
+                promotion_index = PromotionIndex(backend.all_promotions())
+            
+            indexes = self._build_indexes(backend, current.indexes, changed=name)
+            
+            # A single reference assignment, so the swap is atomic
+            self._snapshot = DataSnapshot(
+                backend=backend,
+                promotion_index=promotion_index,
+                version=current.version + 1,
+                indexes=indexes
+            )
+    
+    @property
+    def snapshot(self) -> DataSnapshot:
+        """Current immutable data snapshot; hold on to it for a consistent view"""
+        return self._snapshot
+    
+    @property
+    def data_version(self) -> int:
+        """Version number that increases on every snapshot swap"""
+        return self._snapshot.version
+    
+    @property
+    def backend(self) -> StorageBackend:
+        return self._snapshot.backend
+    
+    def index(self, name: str):
+        """Derived index registered with register_snapshot_index, for the current data"""
+        return self._snapshot.indexes[name]
+    
+    @property
+    def promotion_index(self) -> PromotionIndex:
+        return self._snapshot.promotion_index
+    
+    @property
+    def customers(self) -> List[Dict]:
+        return self.backend.all_customers()
+    
+    @property
+    def products(self) -> List[Dict]:
+        return self.backend.all_products()
+    
+    @property
+    def promotions(self) -> List[Dict]:
+        return self.backend.all_promotions()
+    
+    @property
+    def locations(self) -> List[Dict]:
+        return self.backend.all_locations()
+    
+    @property
+    def policies(self) -> List[Dict]:
+        return self.backend.all_policies()
+    
+    @property
+    def faqs(self) -> List[Dict]:
+        return self.backend.all_faqs()
     
     @staticmethod
     def _load_json(filepath) -> List[Dict]:
         """Load JSON file"""
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"Warning: {filepath} not found")
-            return []
-        except json.JSONDecodeError:
-            print(f"Warning: {filepath} is not valid JSON")
-            return []
+        return load_json_file(filepath)
     
     def get_customer_by_id(self, customer_id: str) -> Optional[Dict]:
         """Get customer by ID"""
-        for customer in self.customers:
-            if customer.get('customer_id') == customer_id:
-                return customer
-        return None
+        return self.backend.get_customer(customer_id)
     
     def get_customer(self, customer_id: str) -> Optional[Dict]:
         """Alias for get_customer_by_id for agent compatibility"""
         return self.get_customer_by_id(customer_id)
     
+    def get_masked_customer(self, customer_id: str) -> Optional[MaskedView]:
+        """
+        Privacy-safe, read-only view of a customer
+        
+        Views are cached per customer on the current snapshot, so repeated
+        turns reuse them until the data is reloaded.
+        """
+        snapshot = self._snapshot
+        cache = snapshot.masked_customers
+        with self._masked_lock:
+            view = cache.get(customer_id)
+            if view is not None:
+                cache.move_to_end(customer_id)
+                return view
+        
+        customer = snapshot.backend.get_customer(customer_id)
+        if customer is None:
+            return None
+        
+        view = PIIMasker.mask_customer_data(customer)
+        with self._masked_lock:
+            cache[customer_id] = view
+            if len(cache) > settings.CUSTOMER_CACHE_SIZE:
+                cache.popitem(last=False)
+        return view
+    
     def get_customer_by_phone(self, phone: str) -> Optional[Dict]:
         """Get customer by phone number"""
-        # Normalize phone (remove spaces, dashes, etc.)
-        normalized = ''.join(filter(str.isdigit, phone))
-        
-        for customer in self.customers:
-            customer_phone = ''.join(filter(str.isdigit, customer.get('phone', '')))
-            if normalized in customer_phone or customer_phone in normalized:
-                return customer
-        return None
+        return self.backend.get_customer_by_phone(phone)
     
     def get_order_by_id(self, order_id: str) -> Optional[Dict]:
         """Get order details by order ID"""
-        for customer in self.customers:
-            for order in customer.get('order_history', []):
-                if order.get('order_id') == order_id:
-                    return {
-                        'order': order,
-                        'customer': customer
-                    }
-        return None
+        return self.backend.get_order(order_id)
     
     def get_products_by_category(self, category: str) -> List[Dict]:
         """Get products by category"""
-        return [p for p in self.products if p.get('category') == category]
+        return self.backend.get_products_by_category(category)
     
     def get_products_by_temperature(self, temp_pref: str) -> List[Dict]:
         """Get products by temperature preference (hot/cold)"""
-        return [p for p in self.products if p.get('temperature') == temp_pref]
+        return self.backend.get_products_by_temperature(temp_pref)
     
     def get_product_by_id(self, product_id: str) -> Optional[Dict]:
         """Get product by ID"""
-        for product in self.products:
-            if product.get('product_id') == product_id:
-                return product
-        return None
+        return self.backend.get_product(product_id)
     
     def get_product_name(self, product_id: str) -> str:
         """Get product name by ID"""
@@ -105,34 +227,7 @@ class CustomerDataLoader:
         Returns:
             List of applicable promotions
         """
-        from datetime import datetime
-        
-        active = []
-        today = datetime.now().date()
-        
-        for promo in self.promotions:
-            # Check date validity
-            valid_from = datetime.strptime(promo['valid_from'], '%Y-%m-%d').date()
-            valid_until = datetime.strptime(promo['valid_until'], '%Y-%m-%d').date()
-            
-            if not (valid_from <= today <= valid_until):
-                continue
-            
-            # Check category filter
-            if category:
-                applicable_cats = promo.get('applicable_categories', [])
-                if applicable_cats and category not in applicable_cats:
-                    continue
-            
-            # Check location filter
-            if location_id:
-                store_ids = promo.get('store_ids', [])
-                if store_ids and location_id not in store_ids:
-                    continue
-            
-            active.append(promo)
-        
-        return active
+        return self.promotion_index.lookup(category=category, location_id=location_id)
     
     def get_customer_preferences(self, customer_id: str) -> Dict:
         """Get customer preferences"""
@@ -171,10 +266,7 @@ class CustomerDataLoader:
     
     def get_location_by_id(self, location_id: str) -> Optional[Dict]:
         """Get location by ID"""
-        for location in self.locations:
-            if location.get('store_id') == location_id:
-                return location
-        return None
+        return self.backend.get_location(location_id)
     
     def get_all_locations(self) -> List[Dict]:
         """Get all locations"""
@@ -247,10 +339,38 @@ class CustomerDataLoader:
 
 # Global loader instance
 _loader = None
+_watcher = None
+
+def register_snapshot_index(name: str, collections: Iterable[str], build: IndexBuilder):
+    """
+    Keep a derived index on every data snapshot
+    
+    The index is built now (if data is loaded) and again whenever one of
+    its collections is reloaded, on the loading thread, so request code
+    only ever reads a finished index via get_data_loader().index(name).
+    
+    Args:
+        name: Index name
+        collections: Collections the index is built from
+        build: build(backend, indexes) -> index; indexes holds the ones
+            registered earlier
+    """
+    _index_builders[name] = (tuple(collections), build)
+    if _loader is not None:
+        _loader.build_index(name)
 
 def get_data_loader() -> CustomerDataLoader:
     """Get global data loader instance"""
-    global _loader
+    global _loader, _watcher
     if _loader is None:
+        watch = settings.HOT_RELOAD_ENABLED
+        if watch and settings.STORAGE_BACKEND.lower() != 'json':
+            print("Warning: hot reload is only supported by the JSON backend")
+            watch = False
+        
+        watcher = DataFileWatcher() if watch else None
         _loader = CustomerDataLoader()
+        if watcher:
+            watcher.start(_loader)
+            _watcher = watcher
     return _loader
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Hot reload of data files
+A background watcher re-parses changed files and swaps a new immutable
+snapshot into the loader, so running requests are never blocked
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+from src.data_loaders.promotion_index import PromotionIndex
+from src.data_loaders.storage import COLLECTION_FILES, StorageBackend
+from src.data_loaders.streaming import iter_json_records
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """Immutable view of all collections and their derived indexes"""
+    backend: StorageBackend
+    promotion_index: PromotionIndex
+    version: int
+    # customer_id -> masked customer view; dropped with the snapshot, so
+    # views never outlive the data version they were built from
+    masked_customers: OrderedDict = field(default_factory=OrderedDict, compare=False, repr=False)
+    # name -> derived index (store KD-tree, gazetteer, ...) built from this
+    # snapshot's collections before it was swapped in
+    indexes: Dict[str, object] = field(default_factory=dict, compare=False, repr=False)
+
+
+def _file_hash(filepath: Path) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DataFileWatcher:
+    """Poll data files and reload the collections that changed"""
+
+    def __init__(self, interval: float = None):
+        """
+        Create the watcher before the loader reads its data, so a change
+        landing in between is still picked up on the first poll
+
+        Args:
+            interval: Seconds between polls (default from settings)
+        """
+        self.loader = None
+        self.interval = interval or settings.HOT_RELOAD_INTERVAL_SEC
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # collection -> (mtime_ns, size, sha256) of the version loaded
+        self._seen: Dict[str, Tuple[int, int, str]] = {}
+        # collection -> file state that failed to parse, so it is not retried
+        self._failed: Dict[str, Tuple[int, int, str]] = {}
+        for name in COLLECTION_FILES:
+            state = self._file_state(name)
+            if state:
+                self._seen[name] = state
+
+    @staticmethod
+    def _path(name: str) -> Path:
+        return Path(getattr(settings, COLLECTION_FILES[name]))
+
+    def _file_state(self, name: str, previous: Tuple = None) -> Optional[Tuple[int, int, str]]:
+        """Current (mtime, size, hash); the hash is reused if mtime/size match"""
+        path = self._path(name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+            return previous
+        return stat.st_mtime_ns, stat.st_size, _file_hash(path)
+
+    def check_once(self) -> List[str]:
+        """
+        Reload every collection whose file content changed
+
+        Returns:
+            Names of the collections that were reloaded
+        """
+        reloaded = []
+
+        for name in COLLECTION_FILES:
+            previous = self._seen.get(name)
+            state = self._file_state(name, previous)
+            if state is None or state == previous or state == self._failed.get(name):
+                continue
+
+            if previous and state[2] == previous[2]:
+                # Touched but unchanged
+                self._seen[name] = state
+                continue
+
+            try:
+                records = list(iter_json_records(self._path(name)))
+            except (OSError, ValueError) as e:
+                # Most likely caught mid-write; keep the old snapshot and
+                # retry once the file changes again
+                print(f"Warning: could not reload {name}: {e}")
+                self._failed[name] = state
+                continue
+
+            self.loader.reload_collection(name, records)
+            self._seen[name] = state
+            reloaded.append(name)
+
+        return reloaded
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                reloaded = self.check_once()
+                if reloaded and settings.DEBUG_MODE:
+                    print(f"Reloaded data: {', '.join(reloaded)}")
+            except Exception as e:
+                print(f"Error in data file watcher: {e}")
+
+    def start(self, loader):
+        """
+        Start polling on a daemon thread
+
+        Args:
+            loader: CustomerDataLoader to swap snapshots into
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self.loader = loader
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="data-file-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,121 @@
+"""
+Precompiled promotion eligibility index
+Parses promotion validity windows once and answers date/category/store
+lookups with set intersections instead of rescanning every promotion
+"""
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, FrozenSet, List, Optional, Set
+
+
+class PromotionIndex:
+    """Date-interval and inverted indexes over a list of promotions"""
+
+    DATE_FORMAT = '%Y-%m-%d'
+
+    def __init__(self, promotions: List[Dict]):
+        self.promotions = promotions
+
+        # Inverted indexes: key -> promotion positions. Promotions with an
+        # empty category/store list apply everywhere and live in the
+        # wildcard sets.
+        self._by_category: Dict[str, Set[int]] = {}
+        self._by_store: Dict[str, Set[int]] = {}
+        self._all_categories: Set[int] = set()
+        self._all_stores: Set[int] = set()
+
+        # Date segments: _boundaries[i] is the first day of segment i and
+        # _segments[i] the promotions active throughout that segment
+        self._boundaries: List[date] = []
+        self._segments: List[FrozenSet[int]] = []
+
+        self._today: Optional[date] = None
+        self._today_active: FrozenSet[int] = frozenset()
+
+        self._build()
+
+    def _build(self):
+        """Parse dates once and build the interval and inverted indexes"""
+        intervals = []
+
+        for idx, promo in enumerate(self.promotions):
+            try:
+                valid_from = datetime.strptime(promo['valid_from'], self.DATE_FORMAT).date()
+                valid_until = datetime.strptime(promo['valid_until'], self.DATE_FORMAT).date()
+            except (KeyError, TypeError, ValueError):
+                print(f"Warning: promotion {promo.get('promo_id')} has invalid dates")
+                continue
+
+            if valid_from > valid_until:
+                continue
+
+            intervals.append((valid_from, valid_until, idx))
+
+            categories = promo.get('applicable_categories', [])
+            if categories:
+                for category in categories:
+                    self._by_category.setdefault(category, set()).add(idx)
+            else:
+                self._all_categories.add(idx)
+
+            store_ids = promo.get('store_ids', [])
+            if store_ids:
+                for store_id in store_ids:
+                    self._by_store.setdefault(store_id, set()).add(idx)
+            else:
+                self._all_stores.add(idx)
+
+        # Every start day and every day after an end day is a point where
+        # the active set can change
+        starts: Dict[date, List[int]] = {}
+        ends: Dict[date, List[int]] = {}
+        for valid_from, valid_until, idx in intervals:
+            starts.setdefault(valid_from, []).append(idx)
+            ends.setdefault(date.fromordinal(valid_until.toordinal() + 1), []).append(idx)
+
+        active: Set[int] = set()
+        for boundary in sorted(set(starts) | set(ends)):
+            active.difference_update(ends.get(boundary, []))
+            active.update(starts.get(boundary, []))
+            self._boundaries.append(boundary)
+            self._segments.append(frozenset(active))
+
+    def active_on(self, day: date) -> FrozenSet[int]:
+        """Positions of promotions valid on the given day"""
+        pos = bisect_right(self._boundaries, day) - 1
+        if pos < 0:
+            return frozenset()
+        return self._segments[pos]
+
+    def active_today(self) -> FrozenSet[int]:
+        """Positions of promotions valid today, cached until midnight"""
+        today = datetime.now().date()
+        if today != self._today:
+            self._today_active = self.active_on(today)
+            self._today = today
+        return self._today_active
+
+    def lookup(self,
+               category: str = None,
+               location_id: str = None,
+               day: date = None) -> List[Dict]:
+        """
+        Get promotions valid on a day, optionally filtered
+
+        Args:
+            category: Filter by product category
+            location_id: Filter by store ID
+            day: Date to check (defaults to today)
+
+        Returns:
+            Matching promotions in their original order
+        """
+        matches = self.active_today() if day is None else self.active_on(day)
+
+        if category:
+            matches = matches & (self._by_category.get(category, set()) | self._all_categories)
+
+        if location_id:
+            matches = matches & (self._by_store.get(location_id, set()) | self._all_stores)
+
+        return [self.promotions[idx] for idx in sorted(matches)]
@@ -0,0 +1,243 @@
+"""
+Compact record types for catalog and customer data
+Each record keeps its known fields in __slots__ instead of a per-record
+dict, while still behaving like the dicts the rest of the code expects
+"""
+from collections.abc import MutableMapping
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+
+class _Missing:
+    """Marker for a field that was absent from the source record"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<missing>'
+
+
+MISSING = _Missing()
+
+
+class Record(MutableMapping):
+    """
+    Slotted, dict-compatible record
+
+    Known fields live in slots; any other keys go to an overflow dict that
+    is only allocated when needed. Fields absent from the source stay
+    absent, so `'key' in record` behaves as it did for the plain dict.
+    """
+
+    __slots__ = ('_extra',)
+    FIELDS: tuple = ()
+    # field name -> Record subclass used to compact a nested dict
+    NESTED: Dict[str, type] = {}
+    # field name -> slot name (differs when a field shadows a dict method)
+    _SLOT_OF: Dict[str, str] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._SLOT_OF = dict(zip(cls.FIELDS, slot_names(cls.FIELDS)))
+
+    def __init__(self, data: Dict = None):
+        data = data or {}
+        extra = None
+        for slot in self._SLOT_OF.values():
+            object.__setattr__(self, slot, MISSING)
+        for key, value in data.items():
+            if key in self.NESTED:
+                value = self._compact_nested(key, value)
+            slot = self._SLOT_OF.get(key)
+            if slot is not None:
+                object.__setattr__(self, slot, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra = extra
+
+    @classmethod
+    def _compact_nested(cls, key: str, value: Any) -> Any:
+        record_type = cls.NESTED[key]
+        if isinstance(value, list):
+            return [record_type(v) if isinstance(v, dict) else v for v in value]
+        if isinstance(value, dict):
+            return record_type(value)
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        slot = self._SLOT_OF.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            if value is MISSING:
+                raise KeyError(key)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        slot = self._SLOT_OF.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            return default if value is MISSING else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key: str, value: Any):
+        slot = self._SLOT_OF.get(key)
+        if slot is not None:
+            object.__setattr__(self, slot, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        slot = self._SLOT_OF.get(key)
+        if slot is not None and getattr(self, slot) is not MISSING:
+            object.__setattr__(self, slot, MISSING)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        slot = self._SLOT_OF.get(key)
+        if slot is not None:
+            return getattr(self, slot) is not MISSING
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field, slot in self._SLOT_OF.items():
+            if getattr(self, slot) is not MISSING:
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        count = sum(1 for slot in self._SLOT_OF.values() if getattr(self, slot) is not MISSING)
+        return count + (len(self._extra) if self._extra is not None else 0)
+
+    def __bool__(self) -> bool:
+        # `if record:` is common on lookups; stop at the first field rather
+        # than counting them all through __len__
+        for slot in self._SLOT_OF.values():
+            if getattr(self, slot) is not MISSING:
+                return True
+        return bool(self._extra)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def copy(self) -> Dict:
+        """Shallow copy as a plain dict, like dict.copy()"""
+        return dict(self.items())
+
+    def to_dict(self) -> Dict:
+        """Deep conversion back to plain dicts, e.g. for JSON output"""
+        return {key: _to_plain(value) for key, value in self.items()}
+
+
+def slot_names(fields: tuple) -> tuple:
+    """Slot names for fields, suffixing any that would shadow a Record method"""
+    return tuple(f + '_' if hasattr(Record, f) else f for f in fields)
+
+
+def field_reader(record_type: type, fields: Sequence[str],
+                 defaults: Sequence[Any] = None) -> Callable[[Any], tuple]:
+    """
+    Reader for several fields of a record at once, for hot loops
+
+    Records of record_type are read straight from their slots in one
+    C-level call; anything else (plain dicts) goes through .get.
+
+    Args:
+        record_type: Record subclass expected in the fast path
+        fields: Field names to read
+        defaults: Value per field when it is absent (default None)
+
+    Returns:
+        Function mapping a record or dict to a tuple of field values
+    """
+    fields = tuple(fields)
+    defaults = tuple(defaults) if defaults is not None else (None,) * len(fields)
+    read_slots = attrgetter(*(record_type._SLOT_OF[field] for field in fields))
+    single = len(fields) == 1
+
+    def read(record) -> tuple:
+        if type(record) is record_type:
+            values = read_slots(record)
+            if single:
+                values = (values,)
+            if MISSING in values:
+                values = tuple(d if v is MISSING else v for v, d in zip(values, defaults))
+            return values
+        return tuple(map(record.get, fields, defaults))
+
+    return read
+
+
+def _to_plain(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_plain(v) for v in value]
+    return value
+
+
+class GeoRecord(Record):
+    """Latitude/longitude with an address"""
+    FIELDS = ('latitude', 'longitude', 'address', 'city')
+    __slots__ = slot_names(FIELDS)
+
+
+class OrderRecord(Record):
+    """Single order in a customer's history"""
+    FIELDS = ('order_id', 'store_id', 'date', 'items', 'total', 'status')
+    __slots__ = slot_names(FIELDS)
+
+
+class CustomerRecord(Record):
+    """Customer profile with order history"""
+    FIELDS = (
+        'customer_id', 'name', 'email', 'phone', 'location', 'preferences',
+        'order_history', 'loyalty_points', 'join_date',
+    )
+    __slots__ = slot_names(FIELDS)
+    NESTED = {'location': GeoRecord, 'order_history': OrderRecord}
+
+
+class ProductRecord(Record):
+    """Catalog product"""
+    FIELDS = (
+        'product_id', 'name', 'category', 'description', 'price',
+        'temperature', 'is_seasonal', 'calories',
+    )
+    __slots__ = slot_names(FIELDS)
+
+
+class LocationRecord(Record):
+    """Store location"""
+    FIELDS = (
+        'store_id', 'name', 'type', 'location', 'distance_from_center_km',
+        'amenities', 'business_hours', 'current_wait_time_min', 'has_drive_through',
+    )
+    __slots__ = slot_names(FIELDS)
+    NESTED = {'location': GeoRecord}
+
+
+RECORD_TYPES = {
+    'customers': CustomerRecord,
+    'products': ProductRecord,
+    'locations': LocationRecord,
+}
+
+
+def compact_records(collection: str, records: List[Dict]) -> List:
+    """Convert a collection's dicts to compact records where a type exists"""
+    record_type: Optional[type] = RECORD_TYPES.get(collection)
+    if record_type is None:
+        return records
+    return [record_type(r) for r in records]
@@ -0,0 +1,587 @@
+"""
+Storage backends for customer, order and catalog data
+The JSON backend keeps every file in memory; the SQLite backend keeps
+records on disk behind indexes and loads customers lazily
+"""
+import copy
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config import settings
+from src.data_loaders.records import compact_records
+from src.data_loaders.streaming import is_json_lines, iter_json_lines, iter_json_records
+
+
+def _digits(phone: str) -> str:
+    """Keep only the digits of a phone number"""
+    return ''.join(filter(str.isdigit, phone or ''))
+
+
+def load_json_file(filepath) -> List[Dict]:
+    """Load a JSON or JSON Lines data file, returning an empty list if unusable"""
+    try:
+        if is_json_lines(filepath):
+            return list(iter_json_lines(filepath))
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: {filepath} not found")
+        return []
+    except json.JSONDecodeError:
+        print(f"Warning: {filepath} is not valid JSON")
+        return []
+
+
+COLLECTION_FILES = {
+    'customers': 'CUSTOMERS_FILE',
+    'products': 'PRODUCTS_FILE',
+    'promotions': 'PROMOTIONS_FILE',
+    'locations': 'LOCATIONS_FILE',
+    'policies': 'POLICIES_FILE',
+    'faqs': 'FAQS_FILE',
+}
+
+
+class StorageBackend(ABC):
+    """Interface every storage backend implements"""
+
+    @abstractmethod
+    def get_customer(self, customer_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def get_customer_by_phone(self, phone: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def get_product(self, product_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def get_products_by_category(self, category: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def get_products_by_temperature(self, temp_pref: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def get_location(self, location_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def all_customers(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def all_products(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def all_promotions(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def all_locations(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def all_policies(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def all_faqs(self) -> List[Dict]:
+        ...
+
+
+class ReloadableBackend(StorageBackend):
+    """Backend whose collections can be swapped in memory, for hot reload"""
+
+    @abstractmethod
+    def with_collection(self, name: str, records: List[Dict]) -> 'ReloadableBackend':
+        """Return a copy of this backend with one collection replaced"""
+        ...
+
+
+class JSONStorageBackend(ReloadableBackend):
+    """Keep every data file in memory as plain lists"""
+
+    def __init__(self):
+        self.customers = load_json_file(settings.CUSTOMERS_FILE)
+        self.products = load_json_file(settings.PRODUCTS_FILE)
+        self.promotions = load_json_file(settings.PROMOTIONS_FILE)
+        self.locations = load_json_file(settings.LOCATIONS_FILE)
+        self.policies = load_json_file(settings.POLICIES_FILE)
+        self.faqs = load_json_file(settings.FAQS_FILE)
+
+    def with_collection(self, name: str, records: List[Dict]) -> 'JSONStorageBackend':
+        # Copy-on-write: the clone shares every other collection list and
+        # the original stays untouched for readers still holding it
+        if name not in COLLECTION_FILES:
+            raise ValueError(f"Unknown collection: {name}")
+        clone = copy.copy(self)
+        setattr(clone, name, records)
+        return clone
+
+    def get_customer(self, customer_id: str) -> Optional[Dict]:
+        for customer in self.customers:
+            if customer.get('customer_id') == customer_id:
+                return customer
+        return None
+
+    def get_customer_by_phone(self, phone: str) -> Optional[Dict]:
+        normalized = _digits(phone)
+
+        for customer in self.customers:
+            customer_phone = _digits(customer.get('phone', ''))
+            if normalized in customer_phone or customer_phone in normalized:
+                return customer
+        return None
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        for customer in self.customers:
+            for order in customer.get('order_history', []):
+                if order.get('order_id') == order_id:
+                    return {
+                        'order': order,
+                        'customer': customer
+                    }
+        return None
+
+    def get_product(self, product_id: str) -> Optional[Dict]:
+        for product in self.products:
+            if product.get('product_id') == product_id:
+                return product
+        return None
+
+    def get_products_by_category(self, category: str) -> List[Dict]:
+        return [p for p in self.products if p.get('category') == category]
+
+    def get_products_by_temperature(self, temp_pref: str) -> List[Dict]:
+        return [p for p in self.products if p.get('temperature') == temp_pref]
+
+    def get_location(self, location_id: str) -> Optional[Dict]:
+        for location in self.locations:
+            if location.get('store_id') == location_id:
+                return location
+        return None
+
+    def all_customers(self) -> List[Dict]:
+        return self.customers
+
+    def all_products(self) -> List[Dict]:
+        return self.products
+
+    def all_promotions(self) -> List[Dict]:
+        return self.promotions
+
+    def all_locations(self) -> List[Dict]:
+        return self.locations
+
+    def all_policies(self) -> List[Dict]:
+        return self.policies
+
+    def all_faqs(self) -> List[Dict]:
+        return self.faqs
+
+
+class CompactJSONStorageBackend(JSONStorageBackend):
+    """JSON backend that keeps customers, products and locations as slotted records"""
+
+    def __init__(self):
+        super().__init__()
+        self.customers = compact_records('customers', self.customers)
+        self.products = compact_records('products', self.products)
+        self.locations = compact_records('locations', self.locations)
+
+    def with_collection(self, name: str, records: List[Dict]) -> 'CompactJSONStorageBackend':
+        return super().with_collection(name, compact_records(name, records))
+
+    # Hot loops read slots directly instead of going through dict lookups
+
+    def get_customer(self, customer_id: str) -> Optional[Dict]:
+        for customer in self.customers:
+            if customer.customer_id == customer_id:
+                return customer
+        return None
+
+    def get_product(self, product_id: str) -> Optional[Dict]:
+        for product in self.products:
+            if product.product_id == product_id:
+                return product
+        return None
+
+    def get_products_by_category(self, category: str) -> List[Dict]:
+        return [p for p in self.products if p.category == category]
+
+    def get_products_by_temperature(self, temp_pref: str) -> List[Dict]:
+        return [p for p in self.products if p.temperature == temp_pref]
+
+    def get_location(self, location_id: str) -> Optional[Dict]:
+        for location in self.locations:
+            if location.store_id == location_id:
+                return location
+        return None
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    phone_digits TEXT,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_customers_phone ON customers (phone_digits);
+CREATE INDEX IF NOT EXISTS idx_customers_position ON customers (position);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT,
+    customer_id TEXT NOT NULL,
+    store_id TEXT,
+    date TEXT,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_order_id ON orders (order_id);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders (customer_id, position);
+CREATE INDEX IF NOT EXISTS idx_orders_store ON orders (store_id);
+
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT,
+    category TEXT,
+    temperature TEXT,
+    position INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_id ON products (product_id);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products (category);
+CREATE INDEX IF NOT EXISTS idx_products_temperature ON products (temperature);
+
+CREATE TABLE IF NOT EXISTS locations (
+    store_id TEXT,
+    position INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_locations_store ON locations (store_id);
+
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, position)
+);
+"""
+
+
+class SQLiteCustomerTable(Sequence):
+    """
+    Read-only sequence over the customers table
+
+    Nothing is held in memory: iterating streams customers with their
+    orders in one joined query, and indexing reads a single row. Records
+    come straight from the database, bypassing the backend's LRU, so a
+    full scan does not evict the customers that are actually hot.
+    """
+
+    def __init__(self, backend: 'SQLiteStorageBackend'):
+        self._backend = backend
+
+    def __len__(self) -> int:
+        return self._backend._query("SELECT COUNT(*) FROM customers")[0][0]
+
+    def __iter__(self):
+        rows = self._backend._connection().execute(
+            "SELECT c.customer_id, c.data, o.data FROM customers c "
+            "LEFT JOIN orders o ON o.customer_id = c.customer_id "
+            "ORDER BY c.position, o.position"
+        )
+        customer, current_id = None, None
+        for customer_id, data, order_data in rows:
+            if customer is None or customer_id != current_id:
+                if customer is not None:
+                    yield customer
+                customer, current_id = json.loads(data), customer_id
+                customer['order_history'] = []
+            if order_data is not None:
+                customer['order_history'].append(json.loads(order_data))
+        if customer is not None:
+            yield customer
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        rows = self._backend._query(
+            "SELECT customer_id FROM customers ORDER BY position LIMIT 1 OFFSET ?", (index,)
+        ) if index >= 0 else []
+        if not rows:
+            raise IndexError('customer index out of range')
+        return self._backend._load_customer(rows[0][0])
+
+
+class SQLiteStorageBackend(StorageBackend):
+    """Indexed on-disk storage with lazy, cached per-customer loading"""
+
+    def __init__(self, db_path: Path = None, cache_size: int = None):
+        self.db_path = Path(db_path or settings.SQLITE_DB_PATH)
+        if cache_size is None:
+            cache_size = settings.CUSTOMER_CACHE_SIZE
+
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+        # Customers are only read when asked for; the cache keeps hot ones
+        # and hands back the same dict on repeated lookups
+        self._cached_customer = lru_cache(maxsize=cache_size)(self._load_customer)
+        self._collections: Dict[str, List[Dict]] = {}
+        self._customer_table = SQLiteCustomerTable(self)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path))
+            self._local.conn = conn
+        return conn
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return self._connection().execute(sql, params).fetchall()
+
+    def _load_customer(self, customer_id: str) -> Optional[Dict]:
+        rows = self._query(
+            "SELECT data FROM customers WHERE customer_id = ?", (customer_id,)
+        )
+        if not rows:
+            return None
+
+        customer = json.loads(rows[0][0])
+        customer['order_history'] = [
+            json.loads(data) for (data,) in self._query(
+                "SELECT data FROM orders WHERE customer_id = ? ORDER BY position",
+                (customer_id,)
+            )
+        ]
+        return customer
+
+    def clear_cache(self):
+        """Drop cached customers and catalog lists"""
+        self._cached_customer.cache_clear()
+        self._collections = {}
+
+    def get_customer(self, customer_id: str) -> Optional[Dict]:
+        if customer_id is None:
+            return None
+        return self._cached_customer(customer_id)
+
+    def get_customer_by_phone(self, phone: str) -> Optional[Dict]:
+        normalized = _digits(phone)
+
+        rows = self._query(
+            "SELECT customer_id FROM customers WHERE phone_digits = ? "
+            "ORDER BY position LIMIT 1",
+            (normalized,)
+        )
+        if not rows:
+            # Partial numbers (missing country code etc.) need a scan
+            rows = self._query(
+                "SELECT customer_id FROM customers "
+                "WHERE instr(phone_digits, ?) > 0 OR instr(?, phone_digits) > 0 "
+                "ORDER BY position LIMIT 1",
+                (normalized, normalized)
+            )
+        return self.get_customer(rows[0][0]) if rows else None
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        rows = self._query(
+            "SELECT customer_id FROM orders WHERE order_id = ? LIMIT 1", (order_id,)
+        )
+        if not rows:
+            return None
+
+        customer = self.get_customer(rows[0][0])
+        if customer:
+            for order in customer.get('order_history', []):
+                if order.get('order_id') == order_id:
+                    return {
+                        'order': order,
+                        'customer': customer
+                    }
+        return None
+
+    def _products_where(self, column: str, value: str) -> List[Dict]:
+        return [
+            json.loads(data) for (data,) in self._query(
+                f"SELECT data FROM products WHERE {column} = ? ORDER BY position",
+                (value,)
+            )
+        ]
+
+    def get_product(self, product_id: str) -> Optional[Dict]:
+        products = self._products_where('product_id', product_id)
+        return products[0] if products else None
+
+    def get_products_by_category(self, category: str) -> List[Dict]:
+        return self._products_where('category', category)
+
+    def get_products_by_temperature(self, temp_pref: str) -> List[Dict]:
+        return self._products_where('temperature', temp_pref)
+
+    def get_location(self, location_id: str) -> Optional[Dict]:
+        rows = self._query(
+            "SELECT data FROM locations WHERE store_id = ? ORDER BY position LIMIT 1",
+            (location_id,)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def all_customers(self) -> Sequence[Dict]:
+        return self._customer_table
+
+    def _collection(self, name: str, sql: str, params: tuple = ()) -> List[Dict]:
+        """Small catalog collections are read once and kept in memory"""
+        if name not in self._collections:
+            self._collections[name] = [
+                json.loads(data) for (data,) in self._query(sql, params)
+            ]
+        return self._collections[name]
+
+    def _records(self, collection: str) -> List[Dict]:
+        return self._collection(
+            collection,
+            "SELECT data FROM records WHERE collection = ? ORDER BY position",
+            (collection,)
+        )
+
+    def all_products(self) -> List[Dict]:
+        return self._collection('products', "SELECT data FROM products ORDER BY position")
+
+    def all_promotions(self) -> List[Dict]:
+        return self._records('promotions')
+
+    def all_locations(self) -> List[Dict]:
+        return self._collection('locations', "SELECT data FROM locations ORDER BY position")
+
+    def all_policies(self) -> List[Dict]:
+        return self._records('policies')
+
+    def all_faqs(self) -> List[Dict]:
+        return self._records('faqs')
+
+
+def _table_count(conn: sqlite3.Connection, table: str) -> int:
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def import_json_to_sqlite(db_path: Path = None) -> Dict[str, int]:
+    """
+    One-shot import of the JSON data files into a SQLite database
+
+    Existing rows are replaced, so the import can be re-run after the JSON
+    files change. Files are read incrementally, as JSON arrays or JSON Lines.
+
+    Args:
+        db_path: Target database (default from settings)
+
+    Returns:
+        Number of records imported per collection
+    """
+    db_path = Path(db_path or settings.SQLITE_DB_PATH)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    counts = {}
+    conn = sqlite3.connect(str(db_path))
+    try:
+        with conn:
+            conn.executescript(SCHEMA)
+            for table in ('customers', 'orders', 'products', 'locations', 'records'):
+                conn.execute(f"DELETE FROM {table}")
+
+            # Records are streamed straight from the files into the
+            # database, so memory does not grow with the data size
+            customer_count = 0
+            order_count = 0
+            for position, customer in enumerate(iter_json_records(settings.CUSTOMERS_FILE)):
+                orders = customer.pop('order_history', [])
+                conn.execute(
+                    "INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?)",
+                    (customer.get('customer_id'), _digits(customer.get('phone', '')),
+                     position, json.dumps(customer))
+                )
+                conn.executemany(
+                    "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (order.get('order_id'), customer.get('customer_id'),
+                         order.get('store_id'), order.get('date'), i, json.dumps(order))
+                        for i, order in enumerate(orders)
+                    )
+                )
+                customer_count += 1
+                order_count += len(orders)
+            counts['customers'] = customer_count
+            counts['orders'] = order_count
+
+            conn.executemany(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?)",
+                (
+                    (p.get('product_id'), p.get('category'), p.get('temperature'),
+                     i, json.dumps(p))
+                    for i, p in enumerate(iter_json_records(settings.PRODUCTS_FILE))
+                )
+            )
+            counts['products'] = _table_count(conn, 'products')
+
+            conn.executemany(
+                "INSERT INTO locations VALUES (?, ?, ?)",
+                (
+                    (loc.get('store_id'), i, json.dumps(loc))
+                    for i, loc in enumerate(iter_json_records(settings.LOCATIONS_FILE))
+                )
+            )
+            counts['locations'] = _table_count(conn, 'locations')
+
+            for collection, filepath in (
+                ('promotions', settings.PROMOTIONS_FILE),
+                ('policies', settings.POLICIES_FILE),
+                ('faqs', settings.FAQS_FILE),
+            ):
+                conn.executemany(
+                    "INSERT INTO records VALUES (?, ?, ?)",
+                    (
+                        (collection, i, json.dumps(r))
+                        for i, r in enumerate(iter_json_records(filepath))
+                    )
+                )
+                counts[collection] = conn.execute(
+                    "SELECT COUNT(*) FROM records WHERE collection = ?", (collection,)
+                ).fetchone()[0]
+    finally:
+        conn.close()
+
+    return counts
+
+
+def create_storage_backend(backend: str = None) -> StorageBackend:
+    """Create the storage backend named in settings ('json' or 'sqlite')"""
+    backend = (backend or settings.STORAGE_BACKEND).lower()
+
+    if backend == 'json':
+        if settings.COMPACT_RECORDS:
+            return CompactJSONStorageBackend()
+        return JSONStorageBackend()
+    if backend == 'sqlite':
+        if not Path(settings.SQLITE_DB_PATH).exists():
+            print(f"Warning: {settings.SQLITE_DB_PATH} not found, importing JSON data")
+            import_json_to_sqlite()
+        return SQLiteStorageBackend()
+
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,145 @@
+"""
+Streaming readers for large data files
+Records are yielded one at a time from JSON Lines files or top-level JSON
+arrays, so memory stays flat regardless of file size
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterator
+
+JSON_LINES_SUFFIXES = {'.jsonl', '.ndjson'}
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def is_json_lines(filepath) -> bool:
+    """Whether the file is JSON Lines, judged by its extension"""
+    return Path(filepath).suffix.lower() in JSON_LINES_SUFFIXES
+
+
+def iter_json_lines(filepath) -> Iterator[Dict]:
+    """
+    Yield records from a JSON Lines file
+
+    Args:
+        filepath: Path to a file with one JSON object per line
+
+    Yields:
+        Parsed records; blank lines are skipped
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(
+                    f"Invalid record on line {line_no}: {e.msg}", e.doc, e.pos
+                )
+
+
+def iter_json_array(filepath, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Incrementally yield the elements of a top-level JSON array
+
+    Only the element currently being decoded is buffered, so the first
+    record is available before the rest of the file has been read.
+
+    Args:
+        filepath: Path to a file containing a JSON array
+        chunk_size: Number of characters read per step
+
+    Yields:
+        Parsed array elements
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] != '[':
+            raise json.JSONDecodeError("Expected a top-level JSON array", buffer, pos)
+        pos += 1
+
+        expect_value = True
+        seen_value = False
+        while True:
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+
+            char = buffer[pos]
+            if char == ']' and not (expect_value and seen_value):
+                return
+            if not expect_value:
+                if char != ',':
+                    raise json.JSONDecodeError("Expected ',' or ']'", buffer, pos)
+                pos += 1
+                expect_value = True
+                continue
+
+            while True:
+                try:
+                    record, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if not eof and fill():
+                        continue
+                    raise
+                # A number or literal cut at the chunk edge decodes as a
+                # shorter value; only accept it once a delimiter follows
+                after = end
+                while after < len(buffer) and buffer[after].isspace():
+                    after += 1
+                if after < len(buffer) and buffer[after] in ',]':
+                    break
+                if eof or not fill():
+                    break
+
+            pos = end
+            expect_value = False
+            seen_value = True
+            yield record
+
+
+def iter_json_records(filepath) -> Iterator[Dict]:
+    """
+    Yield records from a JSON Lines file or a JSON array file
+
+    Missing files are reported and yield nothing, matching load_json_file.
+
+    Args:
+        filepath: Path to a .jsonl/.ndjson or .json file
+
+    Yields:
+        Parsed records
+    """
+    if not Path(filepath).exists():
+        print(f"Warning: {filepath} not found")
+        return
+
+    if is_json_lines(filepath):
+        yield from iter_json_lines(filepath)
+    else:
+        yield from iter_json_array(filepath)
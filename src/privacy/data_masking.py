@@ -3,7 +3,100 @@ PII (Personally Identifiable Information) masking utilities
 Ensures customer privacy by redacting sensitive data before sending to LLM
 """
 import re
-from typing import Dict, List, Tuple
+import string
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def read_only(value: Any) -> Any:
+    """Wrap mappings and lists in read-only views; other values pass through"""
+    if isinstance(value, Mapping):
+        return MaskedView(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+
+def to_plain(value: Any) -> Any:
+    """Deep copy of a view (or any nested mappings and lists) as plain dicts and lists"""
+    if isinstance(value, Mapping):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, ReadOnlyList)):
+        return [to_plain(item) for item in value]
+    return value
+
+
+class MaskedView(Mapping):
+    """
+    Read-only mapping that overlays redactions on a record
+    
+    Nothing is copied: reads go to the underlying record unless the key is
+    overridden, and nested mappings and lists come back wrapped in views
+    too, so the source data cannot be changed through the view.
+    """
+    
+    __slots__ = ('_source', '_overrides', '_fields')
+    
+    def __init__(self, source: Mapping, overrides: Dict = None, fields: Iterable[str] = None):
+        """
+        Args:
+            source: Underlying record
+            overrides: Keys whose values replace (or add to) the record's
+            fields: If given, only these keys of the record are visible
+        """
+        self._source = source
+        self._overrides = overrides or {}
+        self._fields = frozenset(fields) if fields is not None else None
+    
+    def _visible(self, key: str) -> bool:
+        return (self._fields is None or key in self._fields) and key in self._source
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._overrides:
+            return self._overrides[key]
+        if not self._visible(key):
+            raise KeyError(key)
+        return read_only(self._source[key])
+    
+    def __contains__(self, key) -> bool:
+        return key in self._overrides or self._visible(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        for key in self._source:
+            if key in self._overrides or self._fields is None or key in self._fields:
+                yield key
+        for key in self._overrides:
+            if key not in self._source:
+                yield key
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ReadOnlyList(Sequence):
+    """Read-only view of a list, optionally transforming each item on access"""
+    
+    __slots__ = ('_items', '_wrap')
+    
+    def __init__(self, items: list, wrap=read_only):
+        self._items = items
+        self._wrap = wrap
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._wrap(item) for item in self._items[index]]
+        return self._wrap(self._items[index])
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __repr__(self) -> str:
+        return repr(list(self))
 
 
 class PIIMasker:
@@ -35,81 +128,148 @@ class PIIMasker:
         'ip_address': '[IP_REDACTED]',
     }
     
+    # When matches overlap, the one starting first wins; at the same start,
+    # entity types are tried in this order
+    PRIORITY = ['email', 'credit_card', 'ip_address', 'phone']
+    
+    # Types whose matches always start with one of these characters are
+    # grouped behind a single lookahead, so most positions in ordinary text
+    # are rejected with one character test instead of one per pattern
+    DIGIT_LED = {'credit_card', 'ip_address', 'phone'}
+    DIGIT_LEAD = r'[\d+(]'
+    
     @staticmethod
-    def mask_text(text: str, entities: List[str] = None) -> Tuple[str, List[Dict]]:
+    @lru_cache(maxsize=32)
+    def _scanner(entities: Tuple[str, ...]) -> Optional[re.Pattern]:
         """
-        Mask PII in text
+        One compiled alternation covering every pattern of the given types
+        
+        Each pattern becomes a named group '<type>__<n>', so a match's
+        lastgroup tells which entity type it is.
+        """
+        other, digit_led = [], []
+        for entity_type in PIIMasker.PRIORITY:
+            if entity_type not in entities:
+                continue
+            target = digit_led if entity_type in PIIMasker.DIGIT_LED else other
+            for i, pattern in enumerate(PIIMasker.PATTERNS[entity_type]):
+                target.append(f"(?P<{entity_type}__{i}>{pattern})")
+        
+        alternatives = other
+        if digit_led:
+            alternatives.append(f"(?={PIIMasker.DIGIT_LEAD})(?:{'|'.join(digit_led)})")
+        if not alternatives:
+            return None
+        return re.compile('|'.join(alternatives))
+    
+    @staticmethod
+    def scan(text: str, entities: List[str] = None, pos: int = 0) -> List[Dict]:
+        """
+        Find PII in one left-to-right pass
         
         Args:
-            text: Text to mask
-            entities: List of entity types to mask (if None, mask all)
+            text: Text to scan
+            entities: Entity types to look for (if None, all)
+            pos: Index to start scanning at; earlier text is only used as
+                context for word boundaries
         
         Returns:
-            Tuple of (masked_text, list of detected entities)
+            Non-overlapping matches with type, original text and offsets
+            into the input
         """
         if entities is None:
-            entities = list(PIIMasker.PATTERNS.keys())
+            entities = PIIMasker.PATTERNS.keys()
+        scanner = PIIMasker._scanner(tuple(sorted(set(entities) & PIIMasker.PATTERNS.keys())))
+        if scanner is None:
+            return []
         
-        masked_text = text
-        detected = []
+        return [
+            {
+                'type': match.lastgroup.split('__', 1)[0],
+                'original': match.group(0),
+                'start': match.start(),
+                'end': match.end()
+            }
+            for match in scanner.finditer(text, pos)
+        ]
+    
+    @staticmethod
+    def mask_text(text: str, entities: List[str] = None) -> Tuple[str, List[Dict]]:
+        """
+        Mask PII in text
         
-        for entity_type in entities:
-            if entity_type not in PIIMasker.PATTERNS:
-                continue
-            
-            for pattern in PIIMasker.PATTERNS[entity_type]:
-                matches = re.finditer(pattern, masked_text)
-                for match in matches:
-                    original = match.group(0)
-                    detected.append({
-                        'type': entity_type,
-                        'original': original,
-                        'start': match.start(),
-                        'end': match.end()
-                    })
-                    masked_text = masked_text.replace(
-                        original, 
-                        PIIMasker.MASKS[entity_type]
-                    )
+        Args:
+            text: Text to mask
+            entities: List of entity types to mask (if None, mask all)
         
+        Returns:
+            Tuple of (masked_text, list of detected entities); offsets
+            refer to the original text
+        """
+        detected = PIIMasker.scan(text, entities)
+        masked_text = PIIMasker._replace_spans(text, detected, 0, len(text))
         return masked_text, detected
     
     @staticmethod
-    def mask_customer_data(customer: Dict) -> Dict:
+    def _replace_spans(text: str, detected: List[Dict], start: int, end: int) -> str:
+        """Build text[start:end] with each detected span replaced by its mask"""
+        parts = []
+        last = start
+        for entity in detected:
+            parts.append(text[last:entity['start']])
+            parts.append(PIIMasker.MASKS[entity['type']])
+            last = entity['end']
+        parts.append(text[last:end])
+        return ''.join(parts)
+    
+    @staticmethod
+    def _mask_order(order: Any) -> Any:
+        if isinstance(order, Mapping) and 'payment_method' in order:
+            return MaskedView(order, {'payment_method': '[PAYMENT_REDACTED]'})
+        return read_only(order)
+    
+    @staticmethod
+    def _masked_orders(customer: Mapping) -> Dict:
+        """Override for order_history with payment details masked"""
+        orders = customer.get('order_history')
+        if not isinstance(orders, list):
+            return {}
+        return {'order_history': ReadOnlyList(orders, PIIMasker._mask_order)}
+    
+    @staticmethod
+    def mask_customer_data(customer: Mapping) -> MaskedView:
         """
-        Mask PII in customer data dictionary
+        Mask PII in customer data
         
         Args:
-            customer: Customer data dictionary
+            customer: Customer record (left unchanged)
         
         Returns:
-            Customer data with PII masked
+            Read-only view of the customer with PII masked
         """
-        masked = customer.copy()
+        overrides = {}
         
         # Mask phone
-        if 'phone' in masked:
-            masked['phone'] = PIIMasker.MASKS['phone']
+        if 'phone' in customer:
+            overrides['phone'] = PIIMasker.MASKS['phone']
         
         # Mask email
-        if 'email' in masked:
-            masked['email'] = PIIMasker.MASKS['email']
+        if 'email' in customer:
+            overrides['email'] = PIIMasker.MASKS['email']
         
-        # Keep first name only
-        if 'name' in masked:
-            parts = masked['name'].split()
-            masked['name'] = parts[0] + ' [LAST_NAME_REDACTED]'
+        # Keep first name only (also on its own, for addressing the customer)
+        if 'name' in customer:
+            parts = customer['name'].split()
+            overrides['name'] = parts[0] + ' [LAST_NAME_REDACTED]'
+            overrides['first_name'] = parts[0]
         
         # Mask order history payment details (if any)
-        if 'order_history' in masked:
-            for order in masked['order_history']:
-                if 'payment_method' in order:
-                    order['payment_method'] = '[PAYMENT_REDACTED]'
+        overrides.update(PIIMasker._masked_orders(customer))
         
-        return masked
+        return MaskedView(customer, overrides)
     
     @staticmethod
-    def create_safe_context(customer: Dict, include_fields: List[str] = None) -> Dict:
+    def create_safe_context(customer: Mapping, include_fields: List[str] = None) -> MaskedView:
         """
         Create a safe context with only necessary customer info
         
@@ -118,7 +278,7 @@ class PIIMasker:
             include_fields: List of fields to include
         
         Returns:
-            Safe customer context
+            Read-only safe customer context
         """
         if include_fields is None:
             include_fields = [
@@ -128,22 +288,20 @@ class PIIMasker:
                 'order_history'
             ]
         
-        safe_context = {}
-        
-        for field in include_fields:
-            if field in customer:
-                safe_context[field] = customer[field]
+        overrides = {}
+        if 'order_history' in include_fields:
+            overrides.update(PIIMasker._masked_orders(customer))
         
         # Add masked name (first name only)
         if 'name' in customer:
             parts = customer['name'].split()
-            safe_context['first_name'] = parts[0]
+            overrides['first_name'] = parts[0]
         
         # Add general location (city only, no exact coordinates)
         if 'location' in customer and 'city' in customer['location']:
-            safe_context['city'] = customer['location']['city']
+            overrides['city'] = customer['location']['city']
         
-        return safe_context
+        return MaskedView(customer, overrides, include_fields)
     
     @staticmethod
     def unmask_for_display(masked_text: str, original_data: Dict) -> str:
@@ -194,18 +352,245 @@ class PIIMasker:
         """
         issues = []
         
-        for entity_type, patterns in PIIMasker.PATTERNS.items():
-            for pattern in patterns:
-                matches = re.findall(pattern, text)
-                if matches:
-                    issues.append(
-                        f"Unmasked {entity_type} found: {len(matches)} instance(s)"
-                    )
+        counts: Dict[str, int] = {}
+        for entity in PIIMasker.scan(text):
+            counts[entity['type']] = counts.get(entity['type'], 0) + 1
+        
+        for entity_type in PIIMasker.PATTERNS:
+            if entity_type in counts:
+                issues.append(
+                    f"Unmasked {entity_type} found: {counts[entity_type]} instance(s)"
+                )
         
         is_compliant = len(issues) == 0
         return is_compliant, issues
 
 
+class StreamingPIIMasker:
+    """
+    Mask PII in text that arrives in chunks
+    
+    Each chunk is appended to a small buffer and everything that can no
+    longer become part of a match is released masked. Only the tail that
+    could still grow into PII is held back: the trailing word (it may turn
+    into an email address) and, within the longest digit-led match, a
+    trailing run of digits and separators. The concatenated output equals
+    PIIMasker.mask_text on the whole text.
+    """
+    
+    # Characters that can occur in an email match, and in phone, card and
+    # IP matches (plus whitespace)
+    EMAIL_CHARS = frozenset(string.ascii_letters + string.digits + '._%+-@|')
+    DIGIT_PUNCTUATION = frozenset('+-.()')
+    # Longest possible phone/card/IP match, e.g. "+91-(987)-654-3210"
+    MAX_DIGIT_MATCH = 19
+    
+    def __init__(self, entities: List[str] = None):
+        """
+        Args:
+            entities: Entity types to mask (if None, mask all)
+        """
+        self.entities = list(PIIMasker.PATTERNS.keys()) if entities is None else list(entities)
+        self.detected: List[Dict] = []
+        self._buffer = ''
+        # Last released character, kept as word-boundary context
+        self._context = ''
+        self._offset = 0
+    
+    @classmethod
+    def _is_digit_char(cls, char: str) -> bool:
+        return char.isdecimal() or char.isspace() or char in cls.DIGIT_PUNCTUATION
+    
+    def _holdback_start(self, text: str, pos: int) -> int:
+        """Earliest index in text[pos:] where a match could still be in progress"""
+        hold = len(text)
+        
+        if 'email' in self.entities:
+            i = len(text)
+            while i > pos and text[i - 1] in self.EMAIL_CHARS:
+                i -= 1
+            hold = min(hold, i)
+        
+        if PIIMasker.DIGIT_LED & set(self.entities):
+            i = len(text)
+            lowest = max(pos, len(text) - self.MAX_DIGIT_MATCH)
+            while i > lowest and self._is_digit_char(text[i - 1]):
+                i -= 1
+            # A match can only start on a digit, '+' or '('
+            while i < hold and not (text[i] in '+(' or text[i].isdecimal()):
+                i += 1
+            hold = min(hold, i)
+        
+        return hold
+    
+    def _release(self, final: bool) -> str:
+        text = self._context + self._buffer
+        pos = len(self._context)
+        
+        found = PIIMasker.scan(text, self.entities, pos)
+        boundary = len(text) if final else self._holdback_start(text, pos)
+        
+        # A match crossing the boundary may still change; hold it back whole
+        settled = []
+        for entity in found:
+            if entity['end'] <= boundary:
+                settled.append(entity)
+            else:
+                boundary = min(boundary, entity['start'])
+                break
+        
+        output = PIIMasker._replace_spans(text, settled, pos, boundary)
+        
+        shift = self._offset - pos
+        for entity in settled:
+            self.detected.append({
+                **entity,
+                'start': entity['start'] + shift,
+                'end': entity['end'] + shift
+            })
+        
+        self._offset += boundary - pos
+        if boundary > pos:
+            self._context = text[boundary - 1]
+        self._buffer = text[boundary:]
+        return output
+    
+    def feed(self, chunk: str) -> str:
+        """
+        Add a chunk of text
+        
+        Args:
+            chunk: Next piece of the stream
+        
+        Returns:
+            Masked text that is now safe to show (possibly empty)
+        """
+        self._buffer += chunk
+        return self._release(final=False)
+    
+    def flush(self) -> str:
+        """
+        End the stream
+        
+        Returns:
+            The remaining held-back text, masked
+        """
+        return self._release(final=True)
+
+
+def content_text(content) -> str:
+    """
+    Text of message content: a string, or LangChain content parts (strings
+    and {'type': 'text', 'text': ...} blocks; other blocks carry no text)
+    """
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, str) or (isinstance(part, dict) and part.get("type", "text") == "text")
+    )
+
+
+def mask_pii_stream(chunks: Iterable, entities: List[str] = None) -> Iterator[str]:
+    """
+    Mask PII in a stream of text chunks
+    
+    Args:
+        chunks: Text chunks, e.g. tokens from a streaming LLM response
+            (content-part lists are reduced to their text)
+        entities: Entity types to mask (if None, mask all)
+    
+    Yields:
+        Masked text, released as soon as it can no longer become PII
+    """
+    masker = StreamingPIIMasker(entities)
+    for chunk in chunks:
+        output = masker.feed(content_text(chunk))
+        if output:
+            yield output
+    output = masker.flush()
+    if output:
+        yield output
+
+
+class MaskedHistory:
+    """
+    Masked copies of conversation messages, each computed once
+    
+    Texts are keyed by content; Python caches a string's hash,
+    so looking up a message seen on an earlier turn costs no rescan and
+    masking the whole history each turn only scans the new messages.
+    """
+    
+    def __init__(self, max_size: int = 4096):
+        """
+        Args:
+            max_size: Number of masked messages kept (least recently used
+                are dropped)
+        """
+        self.max_size = max_size
+        self._cache: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def _mask_text(self, text: str) -> str:
+        masked = self._cache.get(text)
+        if masked is not None:
+            self._cache.move_to_end(text)
+            self.hits += 1
+        else:
+            masked = mask_pii(text)
+            self._cache[text] = masked
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+            self.misses += 1
+        return masked
+    
+    def _mask_part(self, part):
+        """One content part with its text masked; non-text blocks pass through"""
+        if isinstance(part, str):
+            return self._mask_text(part)
+        if isinstance(part, dict) and part.get("type") == "text" and isinstance(part.get("text"), str):
+            masked = self._mask_text(part["text"])
+            return part if masked == part["text"] else {**part, "text": masked}
+        return part
+    
+    def mask_message(self, message):
+        """
+        Masked version of one message
+        
+        Args:
+            message: LangChain message (string or content-part list)
+        
+        Returns:
+            The message itself if it holds no PII, otherwise a copy with
+            masked content
+        """
+        content = message.content
+        if isinstance(content, str):
+            masked = self._mask_text(content)
+            if masked == content:
+                return message
+        else:
+            masked = [self._mask_part(part) for part in content]
+            if all(new is old for new, old in zip(masked, content)):
+                return message
+        return message.model_copy(update={'content': masked})
+    
+    def mask(self, messages: List) -> List:
+        """
+        Mask a conversation history
+        
+        Args:
+            messages: LangChain messages, oldest first
+        
+        Returns:
+            New list with every message masked
+        """
+        return [self.mask_message(message) for message in messages]
+
+
 # Convenience functions
 def mask_pii(text: str) -> str:
     """Quick function to mask all PII in text"""
@@ -213,6 +598,6 @@ def mask_pii(text: str) -> str:
     return masked
 
 
-def create_safe_customer_context(customer: Dict) -> Dict:
+def create_safe_customer_context(customer: Mapping) -> MaskedView:
     """Quick function to create safe customer context"""
     return PIIMasker.create_safe_context(customer)
\ No newline at end of file
@@ -1,6 +1,8 @@
 from google import genai
 from google.genai import types
 from typing import List, Optional
+import hashlib
+import re
 import numpy as np
 from src.config import settings
 import os
@@ -96,6 +98,109 @@ class GeminiEmbeddings:
         except Exception as e:
             raise RuntimeError(f"Error embedding query: {e}")
     
+    async def aembed_query(
+        self,
+        text: str,
+        task_type: str = "RETRIEVAL_QUERY"
+    ) -> List[float]:
+        
+        if not text or not text.strip():
+            raise ValueError("text cannot be empty")
+        
+        try:
+            result = await self.client.aio.models.embed_content(
+                model=self.model_name,
+                contents=[text],
+                config=types.EmbedContentConfig(
+                    task_type=task_type,
+                    output_dimensionality=self.output_dimensionality
+                )
+            )
+            
+            embedding_values = result.embeddings[0].values
+            
+            # Normalize for non-3072 dimensions
+            if self.output_dimensionality in self.NORMALIZE_DIMENSIONS:
+                embedding_values = self._normalize_embedding(embedding_values)
+            
+            return embedding_values
+            
+        except Exception as e:
+            raise RuntimeError(f"Error embedding query: {e}")
+    
+    def embed_for_semantic_similarity(self, texts: List[str]) -> List[List[float]]:
+        
+        return self.embed_documents(texts, task_type="SEMANTIC_SIMILARITY")
+    
+    def embed_for_classification(self, texts: List[str]) -> List[List[float]]:
+        
+        return self.embed_documents(texts, task_type="CLASSIFICATION")
+    
+    def embed_for_clustering(self, texts: List[str]) -> List[List[float]]:
+        
+        return self.embed_documents(texts, task_type="CLUSTERING")
+
+
+class FakeEmbeddings:
+    """
+    Deterministic local embeddings for offline runs and benchmarks
+    
+    Words and word pairs are hashed into a fixed number of signed buckets
+    and the vector is normalized, so texts sharing words land close
+    together. No API key or network access is needed.
+    """
+    
+    DEFAULT_DIMENSION = GeminiEmbeddings.DEFAULT_DIMENSION
+    
+    def __init__(self, output_dimensionality: int = DEFAULT_DIMENSION):
+        if output_dimensionality <= 0:
+            raise ValueError(f"output_dimensionality must be positive, got {output_dimensionality}")
+        self.model_name = "fake-hashing-embedding"
+        self.output_dimensionality = output_dimensionality
+    
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        
+        vector = np.zeros(self.output_dimensionality)
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "big")
+            vector[value % self.output_dimensionality] += 1.0 if value >> 63 else -1.0
+        
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+    
+    def embed_documents(
+        self,
+        texts: List[str],
+        task_type: str = "RETRIEVAL_DOCUMENT"
+    ) -> List[List[float]]:
+        
+        if not texts:
+            raise ValueError("texts list cannot be empty")
+        return [self._embed(text) for text in texts]
+    
+    def embed_query(
+        self,
+        text: str,
+        task_type: str = "RETRIEVAL_QUERY"
+    ) -> List[float]:
+        
+        if not text or not text.strip():
+            raise ValueError("text cannot be empty")
+        return self._embed(text)
+    
+    async def aembed_query(
+        self,
+        text: str,
+        task_type: str = "RETRIEVAL_QUERY"
+    ) -> List[float]:
+        
+        return self.embed_query(text, task_type)
+    
     def embed_for_semantic_similarity(self, texts: List[str]) -> List[List[float]]:
         
         return self.embed_documents(texts, task_type="SEMANTIC_SIMILARITY")
@@ -111,6 +216,16 @@ class GeminiEmbeddings:
 
 def get_embeddings(
     output_dimensionality: int = GeminiEmbeddings.DEFAULT_DIMENSION
-) -> GeminiEmbeddings:
+):
+    """
+    Embedding model selected by EMBEDDING_PROVIDER
     
+    Returns:
+        GeminiEmbeddings ("gemini") or FakeEmbeddings ("fake")
+    """
+    provider = settings.EMBEDDING_PROVIDER.lower()
+    if provider == "fake":
+        return FakeEmbeddings(output_dimensionality=output_dimensionality)
+    if provider != "gemini":
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER: {settings.EMBEDDING_PROVIDER} (expected 'gemini' or 'fake')")
     return GeminiEmbeddings(output_dimensionality=output_dimensionality)
\ No newline at end of file
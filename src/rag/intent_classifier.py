@@ -0,0 +1,220 @@
+"""
+Intent classification by nearest centroid of example embeddings
+Each intent's labeled example utterances are embedded once and averaged
+into a centroid; a message is classified with one matrix-vector product
+against the centroid matrix, using the query embedding that retrieval
+already computed
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+from src.rag.vectorstore import VectorStore, get_vectorstore
+
+CENTROIDS_FILE = "intent_centroids.npz"
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase and collapse whitespace, for cache keys"""
+    return ' '.join(message.lower().split())
+
+
+class IntentClassifier:
+    """Nearest-centroid intent classifier over query embeddings"""
+    
+    def __init__(self, vectorstore: VectorStore = None, examples_file: Path = None,
+                 min_similarity: float = None):
+        """
+        Args:
+            vectorstore: Vector store whose query embeddings are reused
+            examples_file: JSON file mapping intent -> example utterances
+            min_similarity: Below this cosine similarity the message is
+                classified as 'general_query'
+        """
+        self.vectorstore = vectorstore or get_vectorstore()
+        self.examples_file = Path(examples_file or settings.INTENT_EXAMPLES_FILE)
+        self.min_similarity = settings.INTENT_MIN_SIMILARITY if min_similarity is None else min_similarity
+        
+        self.intents: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+        # Shared by concurrent sessions, so reads that reorder it are locked
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    @property
+    def ready(self) -> bool:
+        return self.centroids is not None
+    
+    def _load_examples(self) -> Dict[str, List[str]]:
+        with open(self.examples_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _fingerprint(self, examples: Dict[str, List[str]]) -> str:
+        """Identifies the examples and embedding settings the centroids came from"""
+        embeddings = self.vectorstore.embeddings
+        payload = json.dumps({
+            'examples': examples,
+            'model': embeddings.model_name,
+            'dimension': embeddings.output_dimensionality,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def build_centroids(self, examples: Dict[str, List[str]]):
+        """
+        Embed the examples and compute one unit-length centroid per intent
+        
+        Args:
+            examples: Intent -> example utterances
+        """
+        intents = [intent for intent, utterances in examples.items() if utterances]
+        texts = [text for intent in intents for text in examples[intent]]
+        
+        # Embedded as queries, so they live in the same space as messages
+        vectors = np.asarray(
+            self.vectorstore.embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY"),
+            dtype='float32'
+        )
+        
+        centroids = np.empty((len(intents), vectors.shape[1]), dtype='float32')
+        start = 0
+        for row, intent in enumerate(intents):
+            count = len(examples[intent])
+            centroids[row] = vectors[start:start + count].mean(axis=0)
+            start += count
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        
+        self.intents = intents
+        self.centroids = centroids
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def load(self, build: bool = True) -> bool:
+        """
+        Load centroids from disk, rebuilding them if the examples changed
+        
+        Args:
+            build: Embed the examples when no matching centroids are saved
+        
+        Returns:
+            True if the classifier is ready
+        """
+        try:
+            examples = self._load_examples()
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load intent examples: {e}")
+            return False
+        
+        fingerprint = self._fingerprint(examples)
+        path = settings.VECTORSTORE_PATH / CENTROIDS_FILE
+        
+        if path.exists():
+            try:
+                with np.load(path) as data:
+                    if str(data['fingerprint']) == fingerprint:
+                        self.intents = [str(intent) for intent in data['intents']]
+                        self.centroids = data['centroids'].astype('float32')
+                        with self._cache_lock:
+                            self._cache.clear()
+                        return True
+            except Exception as e:
+                print(f"Could not load intent centroids: {e}")
+        
+        if not build:
+            return False
+        
+        try:
+            self.build_centroids(examples)
+        except Exception as e:
+            print(f"Warning: Could not build intent centroids: {e}")
+            return False
+        
+        try:
+            settings.VECTORSTORE_PATH.mkdir(parents=True, exist_ok=True)
+            np.savez(path, intents=np.array(self.intents), centroids=self.centroids,
+                     fingerprint=np.array(fingerprint))
+        except Exception as e:
+            print(f"Error saving intent centroids: {e}")
+        return True
+    
+    def scores(self, embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a unit-length embedding to every centroid"""
+        return self.centroids @ embedding
+    
+    def _cached(self, message: str) -> Tuple[Optional[str], Optional[Tuple[str, float]]]:
+        """Cache key for a message and its cached result, if any"""
+        if not self.ready or not message or not message.strip():
+            return None, None
+        key = normalize_message(message)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        return key, cached
+    
+    def _classify_embedding(self, key: str, embedding: np.ndarray) -> Tuple[str, float]:
+        scores = self.scores(embedding)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        intent = self.intents[best] if score >= self.min_similarity else 'general_query'
+        
+        result = (intent, score)
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > settings.INTENT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+    
+    def classify(self, message: str) -> Optional[Tuple[str, float]]:
+        """
+        Classify a message
+        
+        Args:
+            message: User's message
+        
+        Returns:
+            (intent, similarity), or None if the classifier is not ready
+            or the message could not be embedded
+        """
+        key, cached = self._cached(message)
+        if key is None or cached is not None:
+            return cached
+        
+        try:
+            embedding = self.vectorstore.embed_query(message)
+        except Exception as e:
+            print(f"Error embedding message for intent: {e}")
+            return None
+        
+        return self._classify_embedding(key, embedding)
+    
+    async def aclassify(self, message: str) -> Optional[Tuple[str, float]]:
+        """Async classify; shares embeddings with async retrieval"""
+        key, cached = self._cached(message)
+        if key is None or cached is not None:
+            return cached
+        
+        try:
+            embedding = await self.vectorstore.aembed_query(message)
+        except Exception as e:
+            print(f"Error embedding message for intent: {e}")
+            return None
+        
+        return self._classify_embedding(key, embedding)
+
+
+# Global classifier instance
+_intent_classifier = None
+
+def get_intent_classifier() -> IntentClassifier:
+    """Get global intent classifier, loading (or building) its centroids"""
+    global _intent_classifier
+    if _intent_classifier is None:
+        _intent_classifier = IntentClassifier()
+        _intent_classifier.load()
+    return _intent_classifier
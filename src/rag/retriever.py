@@ -4,6 +4,7 @@ Document retrieval and RAG pipeline
 from typing import List, Dict
 from src.rag.vectorstore import get_vectorstore
 from src.data_loaders.custom_loader import get_data_loader
+from src.data_loaders.streaming import iter_json_records
 from src.config import settings
 
 
@@ -31,6 +32,18 @@ class DocumentRetriever:
         # Search vector store
         search_results = self.vectorstore.search(query, top_k=top_k)
         
+        return self._build_context(query, search_results)
+    
+    async def aretrieve_context(self, query: str, top_k: int = None) -> Dict:
+        """Async retrieve_context; the query embedding call does not block"""
+        if top_k is None:
+            top_k = settings.TOP_K_RESULTS
+        
+        search_results = await self.vectorstore.asearch(query, top_k=top_k)
+        
+        return self._build_context(query, search_results)
+    
+    def _build_context(self, query: str, search_results: List[Dict]) -> Dict:
         # Format results
         context = {
             'query': query,
@@ -183,13 +196,13 @@ def initialize_vectorstore():
     print("Initializing vector store...")
     
     vectorstore = get_vectorstore()
-    data_loader = get_data_loader()
     
+    # Records are streamed from the data files rather than loaded whole
     documents = []
     metadata = []
     
     # Add policies
-    for policy in data_loader.policies:
+    for policy in iter_json_records(settings.POLICIES_FILE):
         doc_text = f"{policy['title']}\n\n{policy['content']}"
         
         if 'sections' in policy:
@@ -204,7 +217,7 @@ def initialize_vectorstore():
         })
     
     # Add FAQs
-    for faq in data_loader.faqs:
+    for faq in iter_json_records(settings.FAQS_FILE):
         doc_text = f"Q: {faq['question']}\nA: {faq['answer']}"
         documents.append(doc_text)
         metadata.append({
@@ -214,7 +227,7 @@ def initialize_vectorstore():
         })
     
     # Add product information
-    for product in data_loader.products:
+    for product in iter_json_records(settings.PRODUCTS_FILE):
         doc_text = f"{product['name']}: {product['description']}"
         doc_text += f"\nCategory: {product['category']}, Price: ₹{product['price']}"
         
@@ -230,6 +243,11 @@ def initialize_vectorstore():
     if documents:
         vectorstore.create_index(documents, metadata)
         print(f"Vector store initialized with {len(documents)} documents")
+        
+        # Intent centroids share the embedding model, so build them too
+        from src.rag.intent_classifier import IntentClassifier
+        if IntentClassifier(vectorstore).load():
+            print("Intent centroids ready")
         return True
     else:
         print("Warning: No documents to index")
@@ -1,8 +1,11 @@
+import asyncio
 import os
 import pickle
+import threading
+from collections import OrderedDict
 import faiss
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from src.config import settings
 from src.rag.embeddings import get_embeddings
 
@@ -15,7 +18,13 @@ class VectorStore:
         self.index = None
         self.documents = []
         self.metadata = []
-        self.dimension = 768  # Gemini embedding dimension
+        self.dimension = self.embeddings.output_dimensionality
+        # Query embeddings, shared by retrieval and intent classification
+        # (sync and async) so a message is embedded once per turn
+        self._query_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # (event loop, query) -> embedding task, guarded by _cache_lock
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
         
         # Try to load existing index
         self.load_index()
@@ -48,30 +57,71 @@ class VectorStore:
         # Save index
         self.save_index()
     
-    def search(self, query: str, top_k: int = None) -> List[Dict]:
+    def _cached_embedding(self, query: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vector = self._query_cache.get(query)
+            if vector is not None:
+                self._query_cache.move_to_end(query)
+            return vector
+    
+    def _cache_embedding(self, query: str, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype='float32')
+        vector.setflags(write=False)
+        with self._cache_lock:
+            self._query_cache[query] = vector
+            if len(self._query_cache) > settings.QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vector
+    
+    def embed_query(self, query: str) -> np.ndarray:
         """
-        Search for similar documents
+        Embed a query (cached)
         
         Args:
             query: Query string
-            top_k: Number of results to return
         
         Returns:
-            List of dictionaries with document, metadata, and score
+            Read-only float32 vector
         """
-        if self.index is None or self.index.ntotal == 0:
-            print("Warning: Index is empty")
-            return []
-        
-        if top_k is None:
-            top_k = settings.TOP_K_RESULTS
-        
-        # Embed query
-        query_embedding = self.embeddings.embed_query(query)
-        query_vector = np.array([query_embedding]).astype('float32')
+        vector = self._cached_embedding(query)
+        if vector is None:
+            vector = self._cache_embedding(query, self.embeddings.embed_query(query))
+        return vector
+    
+    async def _aembed_and_cache(self, query: str) -> np.ndarray:
+        return self._cache_embedding(query, await self.embeddings.aembed_query(query))
+    
+    def _inflight_done(self, key: Tuple, task: asyncio.Task):
+        with self._cache_lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        # Mark the outcome retrieved so a failure nobody awaited is not logged
+        if not task.cancelled():
+            task.exception()
+    
+    async def aembed_query(self, query: str) -> np.ndarray:
+        """
+        Async embed_query; concurrent calls for the same query on one event
+        loop share one API request
+        """
+        vector = self._cached_embedding(query)
+        if vector is not None:
+            return vector
         
-        # Search
-        distances, indices = self.index.search(query_vector, top_k)
+        loop = asyncio.get_running_loop()
+        key = (loop, query)
+        with self._cache_lock:
+            task = self._inflight.get(key)
+            if task is None:
+                task = loop.create_task(self._aembed_and_cache(query))
+                self._inflight[key] = task
+                task.add_done_callback(lambda done, key=key: self._inflight_done(key, done))
+        # Shielded: a cancelled caller leaves the request running for the
+        # other waiters (and the cache)
+        return await asyncio.shield(task)
+    
+    def _search_vector(self, query_vector: np.ndarray, top_k: int) -> List[Dict]:
+        distances, indices = self.index.search(np.array([query_vector]), top_k)
         
         # Format results
         results = []
@@ -86,6 +136,37 @@ class VectorStore:
         
         return results
     
+    def search(self, query: str, top_k: int = None) -> List[Dict]:
+        """
+        Search for similar documents
+        
+        Args:
+            query: Query string
+            top_k: Number of results to return
+        
+        Returns:
+            List of dictionaries with document, metadata, and score
+        """
+        if self.index is None or self.index.ntotal == 0:
+            print("Warning: Index is empty")
+            return []
+        
+        if top_k is None:
+            top_k = settings.TOP_K_RESULTS
+        
+        return self._search_vector(self.embed_query(query), top_k)
+    
+    async def asearch(self, query: str, top_k: int = None) -> List[Dict]:
+        """Async search: the query is embedded without blocking the event loop"""
+        if self.index is None or self.index.ntotal == 0:
+            print("Warning: Index is empty")
+            return []
+        
+        if top_k is None:
+            top_k = settings.TOP_K_RESULTS
+        
+        return self._search_vector(await self.aembed_query(query), top_k)
+    
     def add_documents(self, documents: List[str], metadata: List[Dict] = None):
         """
         Add new documents to existing index
@@ -133,7 +214,8 @@ class VectorStore:
             with open(data_path, 'wb') as f:
                 pickle.dump({
                     'documents': self.documents,
-                    'metadata': self.metadata
+                    'metadata': self.metadata,
+                    'model': self.embeddings.model_name
                 }, f)
             
             print(f"Index saved to {settings.VECTORSTORE_PATH}")
@@ -147,14 +229,21 @@ class VectorStore:
             data_path = settings.VECTORSTORE_PATH / f"{settings.FAISS_INDEX_NAME}.pkl"
             
             if index_path.exists() and data_path.exists():
-                # Load FAISS index
-                self.index = faiss.read_index(str(index_path))
-                
-                # Load documents and metadata
                 with open(data_path, 'rb') as f:
                     data = pickle.load(f)
-                    self.documents = data['documents']
-                    self.metadata = data['metadata']
+                
+                # Vectors from another embedding model are not comparable
+                # (indexes saved before the model was recorded are Gemini's)
+                model = data.get('model', 'gemini-embedding-001')
+                if model != self.embeddings.model_name:
+                    print(f"Warning: Saved index was built with {model}, not "
+                          f"{self.embeddings.model_name}; rebuild it with initialize_vectorstore()")
+                    return False
+                
+                # Load FAISS index
+                self.index = faiss.read_index(str(index_path))
+                self.documents = data['documents']
+                self.metadata = data['metadata']
                 
                 print(f"Loaded index with {self.index.ntotal} vectors")
                 return True
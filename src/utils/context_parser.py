@@ -1,7 +1,8 @@
 """
 Context parsing utilities to extract intent and entities from user messages
 """
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
 import re
 
 
@@ -47,6 +48,15 @@ class ContextParser:
             r'\bwrong\s+order\b',
             r'\bcold\s+coffee\b',
         ],
+        # Small talk; listed last so any other intent comes first
+        'greeting': [
+            r'\bhi\b',
+            r'\bhello\b',
+            r'\bhey\b',
+            r'\bthanks?\b',
+            r'\bthank\s+you\b',
+            r'\bgood\s+(morning|afternoon|evening)\b',
+        ],
     }
     
     # Entity patterns
@@ -61,6 +71,43 @@ class ContextParser:
         'food': ['sandwich', 'pastry', 'muffin', 'croissant', 'cake', 'salad'],
     }
     
+    URGENT_KEYWORDS = [
+        'urgent', 'asap', 'emergency', 'immediately', 'right now',
+        'hurry', 'quick', 'fast', 'waiting', 'late'
+    ]
+    
+    # Match patterns like ORD1001, ORDER123, #12345 (in priority order)
+    ORDER_ID_PATTERNS = [
+        r'\bORD\d+\b',
+        r'\bORDER\d+\b',
+        r'#\d+',
+    ]
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _scanner() -> 'ContextScanner':
+        return ContextScanner(
+            ContextParser.INTENT_PATTERNS,
+            ContextParser.TEMPERATURE_KEYWORDS,
+            ContextParser.PRODUCT_CATEGORIES,
+            ContextParser.URGENT_KEYWORDS,
+            ContextParser.ORDER_ID_PATTERNS
+        )
+    
+    @staticmethod
+    def scan(message: str) -> Dict:
+        """
+        Extract intents and entities in one pass over the message
+        
+        Args:
+            message: User's message
+        
+        Returns:
+            Dictionary with intents, temperature_context,
+            product_preferences, order_id and is_urgent
+        """
+        return ContextParser._scanner().scan(message)
+    
     @staticmethod
     def detect_intent(message: str) -> List[str]:
         """
@@ -72,16 +119,7 @@ class ContextParser:
         Returns:
             List of detected intents
         """
-        message_lower = message.lower()
-        detected_intents = []
-        
-        for intent, patterns in ContextParser.INTENT_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, message_lower):
-                    detected_intents.append(intent)
-                    break
-        
-        return detected_intents if detected_intents else ['general_query']
+        return ContextParser.scan(message)['intents']
     
     @staticmethod
     def extract_temperature_context(message: str) -> Optional[str]:
@@ -94,14 +132,7 @@ class ContextParser:
         Returns:
             'hot', 'cold', or None
         """
-        message_lower = message.lower()
-        
-        for temp_type, keywords in ContextParser.TEMPERATURE_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    return temp_type
-        
-        return None
+        return ContextParser.scan(message)['temperature_context']
     
     @staticmethod
     def extract_product_preferences(message: str) -> List[str]:
@@ -114,17 +145,7 @@ class ContextParser:
         Returns:
             List of relevant product categories
         """
-        message_lower = message.lower()
-        preferences = []
-        
-        for category, keywords in ContextParser.PRODUCT_CATEGORIES.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    if category not in preferences:
-                        preferences.append(category)
-                    break
-        
-        return preferences
+        return ContextParser.scan(message)['product_preferences']
     
     @staticmethod
     def extract_order_id(message: str) -> Optional[str]:
@@ -137,19 +158,7 @@ class ContextParser:
         Returns:
             Order ID or None
         """
-        # Match patterns like ORD1001, ORDER123, #12345
-        patterns = [
-            r'\bORD\d+\b',
-            r'\bORDER\d+\b',
-            r'#\d+',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, message.upper())
-            if match:
-                return match.group(0).lstrip('#')
-        
-        return None
+        return ContextParser.scan(message)['order_id']
     
     @staticmethod
     def is_urgent(message: str) -> bool:
@@ -162,13 +171,7 @@ class ContextParser:
         Returns:
             True if urgent
         """
-        urgent_keywords = [
-            'urgent', 'asap', 'emergency', 'immediately', 'right now',
-            'hurry', 'quick', 'fast', 'waiting', 'late'
-        ]
-        
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in urgent_keywords)
+        return ContextParser.scan(message)['is_urgent']
     
     @staticmethod
     def parse_context(message: str, customer_data: Optional[Dict] = None) -> Dict:
@@ -184,11 +187,7 @@ class ContextParser:
         """
         context = {
             'message': message,
-            'intents': ContextParser.detect_intent(message),
-            'temperature_context': ContextParser.extract_temperature_context(message),
-            'product_preferences': ContextParser.extract_product_preferences(message),
-            'order_id': ContextParser.extract_order_id(message),
-            'is_urgent': ContextParser.is_urgent(message),
+            **ContextParser.scan(message),
             'customer_data': customer_data,
         }
         
@@ -221,4 +220,136 @@ class ContextParser:
         if context['is_urgent']:
             lines.append("⚠️ URGENT")
         
-        return '\n'.join(lines)
\ No newline at end of file
+        return '\n'.join(lines)
+
+
+def _required_literal(pattern: str) -> str:
+    """
+    Longest literal run every match of a regex must contain (lowercased)
+    
+    Groups, character classes, escapes such as \\s and optional characters
+    break runs; a pattern with a top-level alternation has none. The result
+    only has to be safe (never absent from a match), not complete.
+    """
+    if '|' in re.sub(r'\\.|\[[^\]]*\]|\([^()]*\)', '', pattern):
+        return ''
+    
+    best, run = '', ''
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char in '([':
+            # Skip the group or class (and a quantifier on it)
+            close, depth = {'(': ')', '[': ']'}[char], 1
+            i += 1
+            while i < n and depth:
+                if pattern[i] == '\\':
+                    i += 2
+                    continue
+                if pattern[i] == close:
+                    depth -= 1
+                elif pattern[i] == char and char == '(':
+                    depth += 1
+                i += 1
+            literal = None
+        elif char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            literal = None if escaped.isalnum() else escaped
+            i += 2
+        elif char in '.^$+?*{}|)]':
+            literal = None
+            i += 1
+        else:
+            literal = char
+            i += 1
+        
+        optional = i < n and pattern[i] in '?*{'
+        if literal is None or optional:
+            best, run = max(best, run, key=len), ''
+            if optional:
+                i += 1
+            continue
+        run += literal
+        if i < n and pattern[i] == '+':
+            best, run = max(best, run, key=len), ''
+    return max(best, run, key=len).lower()
+
+
+class ContextScanner:
+    """
+    Precompiled extractor for intents and entities
+    
+    Every intent and order-ID pattern is compiled once and guarded by a
+    literal its matches must contain: a substring test (a C-level scan)
+    rules most patterns out before the regex runs, so the cost grows with
+    the number of likely patterns rather than with every pattern times
+    the message length. Keywords are plain substring tests.
+    """
+    
+    def __init__(self, intent_patterns: Dict[str, List[str]], temperature_keywords: Dict[str, List[str]],
+                 product_categories: Dict[str, List[str]], urgent_keywords: List[str],
+                 order_id_patterns: List[str]):
+        self.temperature_keywords = temperature_keywords
+        self.product_categories = product_categories
+        self.urgent_keywords = set(urgent_keywords)
+        
+        keywords = set(urgent_keywords)
+        for groups in (temperature_keywords, product_categories):
+            for words in groups.values():
+                keywords.update(words)
+        self.keywords = sorted(keywords)
+        
+        # intent -> [(required literal, regex)], in priority order
+        self._intents = [
+            (intent, [(_required_literal(pattern), re.compile(pattern)) for pattern in patterns])
+            for intent, patterns in intent_patterns.items()
+        ]
+        # Order IDs in priority order, matched on the original case
+        self._order_ids = [
+            (_required_literal(pattern), re.compile(pattern, re.IGNORECASE))
+            for pattern in order_id_patterns
+        ]
+    
+    def scan(self, message: str) -> Dict:
+        """
+        Extract everything from a message
+        
+        Args:
+            message: User's message
+        
+        Returns:
+            Dictionary with intents, temperature_context,
+            product_preferences, order_id and is_urgent
+        """
+        text = message.lower()
+        
+        intents = [
+            intent for intent, checks in self._intents
+            if any(literal in text and regex.search(text) for literal, regex in checks)
+        ]
+        keywords: Set[str] = {word for word in self.keywords if word in text}
+        
+        order_id = None
+        for literal, regex in self._order_ids:
+            match = regex.search(message) if literal in text else None
+            if match:
+                order_id = match.group(0).upper().lstrip('#')
+                break
+        
+        temperature = next(
+            (temp_type for temp_type, words in self.temperature_keywords.items()
+             if keywords.intersection(words)),
+            None
+        )
+        categories = [
+            category for category, words in self.product_categories.items()
+            if keywords.intersection(words)
+        ]
+        
+        return {
+            'intents': intents or ['general_query'],
+            'temperature_context': temperature,
+            'product_preferences': categories,
+            'order_id': order_id,
+            'is_urgent': bool(keywords & self.urgent_keywords),
+        }
@@ -0,0 +1,271 @@
+"""
+Offline gazetteer for resolving typed place names to coordinates
+Built from the store and customer addresses already in the data files,
+plus an optional place-name dataset, with no geocoding service involved
+"""
+import csv
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.data_loaders.streaming import iter_json_records
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+# Common short forms seen in addresses
+ALIASES = {
+    'cp': 'connaught place',
+    'gurugram': 'gurgaon',
+    'new delhi': 'delhi',
+}
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase, reduce to space-separated words and expand known aliases"""
+    padded = f" {_NON_WORD.sub(' ', (text or '').lower()).strip()} "
+    for alias, target in ALIASES.items():
+        padded = padded.replace(f" {alias} ", f" {target} ")
+    return padded.strip()
+
+
+def _trigrams(name: str) -> set:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Place:
+    """Named place; coordinates are the mean of every source that used the name"""
+
+    __slots__ = ('name', 'city', '_lat_sum', '_lon_sum', '_count')
+
+    def __init__(self, name: str, city: Optional[str] = None):
+        self.name = name
+        self.city = city
+        self._lat_sum = 0.0
+        self._lon_sum = 0.0
+        self._count = 0
+
+    def add(self, latitude: float, longitude: float):
+        self._lat_sum += latitude
+        self._lon_sum += longitude
+        self._count += 1
+
+    @property
+    def latitude(self) -> float:
+        return self._lat_sum / self._count
+
+    @property
+    def longitude(self) -> float:
+        return self._lon_sum / self._count
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'city': self.city,
+        }
+
+
+class Gazetteer:
+    """
+    Place-name index with a word-level prefix trie and a trigram fuzzy index
+
+    The trie finds every known place name inside free text ("coffee near
+    sector 56 gurgaon"); the trigram index catches misspellings when the
+    trie finds nothing.
+    """
+
+    FUZZY_THRESHOLD = 0.5
+
+    def __init__(self):
+        self.places: Dict[str, Place] = {}
+        self._trie: Dict = {}
+        self._trigram_index: Dict[str, set] = {}
+        # Repeated inputs are answered from an LRU cache
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
+
+    def add_place(self, name: str, latitude: float, longitude: float, city: str = None):
+        """
+        Add a place name (repeated names are averaged)
+
+        Args:
+            name: Place name, e.g. "Sector 56, Gurgaon"
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+            city: City the place belongs to
+        """
+        key = normalize_place(name)
+        if not key or latitude is None or longitude is None:
+            return
+
+        place = self.places.get(key)
+        if place is None:
+            place = Place(key, city)
+            self.places[key] = place
+
+            node = self._trie
+            for word in key.split():
+                node = node.setdefault(word, {})
+            node[None] = key
+
+            for gram in _trigrams(key):
+                self._trigram_index.setdefault(gram, set()).add(key)
+
+        place.add(float(latitude), float(longitude))
+        self.lookup.cache_clear()
+
+    def add_address(self, address: str, latitude: float, longitude: float, city: str = None):
+        """Add a full address and each of its comma-separated parts"""
+        if not address:
+            return
+        self.add_place(address, latitude, longitude, city)
+        for part in address.split(','):
+            self.add_place(part, latitude, longitude, city)
+        if city and normalize_place(city) not in normalize_place(address):
+            self.add_place(f"{address}, {city}", latitude, longitude, city)
+
+    def add_locations(self, records: Iterable[Dict]):
+        """Add store or customer records that have a 'location' block"""
+        for record in records:
+            loc = record.get('location') or {}
+            lat, lon = loc.get('latitude'), loc.get('longitude')
+            city = loc.get('city')
+            self.add_address(loc.get('address'), lat, lon, city)
+            if city:
+                self.add_place(city, lat, lon, city)
+            if record.get('store_id') and record.get('name'):
+                self.add_place(record['name'], lat, lon, city)
+
+    def load_file(self, filepath) -> int:
+        """
+        Import a place-name dataset
+
+        CSV files need name, latitude and longitude columns (city is
+        optional); .json/.jsonl files hold records with the same keys.
+
+        Args:
+            filepath: Dataset path
+
+        Returns:
+            Number of places read
+        """
+        path = Path(filepath)
+        if not path.exists():
+            print(f"Warning: {path} not found")
+            return 0
+
+        if path.suffix.lower() == '.csv':
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f))
+        else:
+            rows = iter_json_records(path)
+
+        count = 0
+        for row in rows:
+            try:
+                lat, lon = float(row['latitude']), float(row['longitude'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.add_place(row.get('name'), lat, lon, row.get('city') or None)
+            count += 1
+        return count
+
+    def _find_in_text(self, words: List[str]) -> Optional[Place]:
+        """Longest known place name appearing in the words"""
+        best_key, best_len = None, 0
+        for start in range(len(words)):
+            node = self._trie
+            for end in range(start, len(words)):
+                node = node.get(words[end])
+                if node is None:
+                    break
+                key = node.get(None)
+                if key and end - start + 1 > best_len:
+                    best_key, best_len = key, end - start + 1
+        return self.places[best_key] if best_key else None
+
+    def _fuzzy(self, key: str) -> Optional[Place]:
+        """Closest place name by trigram Jaccard similarity"""
+        grams = _trigrams(key)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for name in self._trigram_index.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+
+        best_name, best_score = None, self.FUZZY_THRESHOLD
+        for name, overlap in shared.items():
+            score = overlap / (len(grams) + len(_trigrams(name)) - overlap)
+            if score > best_score:
+                best_name, best_score = name, score
+        return self.places[best_name] if best_name else None
+
+    def _lookup(self, text: str) -> Optional[Place]:
+        """Exact name, then the longest name inside the text, then fuzzy match"""
+        key = normalize_place(text)
+        if not key:
+            return None
+        return self.places.get(key) or self._find_in_text(key.split()) or self._fuzzy(key)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Place names starting with a prefix, for autocompletion
+
+        Args:
+            prefix: Partial place name; the last word may be incomplete
+            limit: Maximum number of names
+
+        Returns:
+            Matching place names
+        """
+        words = normalize_place(prefix).split()
+        if not words:
+            return []
+
+        node = self._trie
+        for word in words[:-1]:
+            node = node.get(word)
+            if node is None:
+                return []
+
+        def children(current: Dict, word_prefix: str = '') -> List[Dict]:
+            # Reversed so the stack pops them in alphabetical order
+            words = sorted((w for w in current if w is not None and w.startswith(word_prefix)), reverse=True)
+            return [current[w] for w in words]
+
+        results = []
+        stack = children(node, words[-1])
+        while stack and len(results) < limit:
+            current = stack.pop()
+            if None in current:
+                results.append(current[None])
+            stack.extend(children(current))
+        return results
+
+
+def build_gazetteer(locations: List[Dict], customers: List[Dict], dataset_file=None) -> Gazetteer:
+    """
+    Build a gazetteer from store and customer records
+
+    Args:
+        locations: Store records
+        customers: Customer records
+        dataset_file: Optional extra place-name dataset
+
+    Returns:
+        Populated Gazetteer
+    """
+    gazetteer = Gazetteer()
+    gazetteer.add_locations(locations)
+    gazetteer.add_locations(customers)
+    if dataset_file and Path(dataset_file).exists():
+        gazetteer.load_file(dataset_file)
+    return gazetteer
+
+
+def place_coordinates(place: Optional[Place]) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a place, or None"""
+    if place is None:
+        return None
+    return place.latitude, place.longitude
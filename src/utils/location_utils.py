@@ -1,8 +1,12 @@
-from typing import Dict, List, Tuple
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 import math
-import json
-from pathlib import Path
+import numpy as np
 from src.config import settings
+from src.data_loaders.custom_loader import get_data_loader, register_snapshot_index
+from src.utils.gazetteer import Gazetteer, build_gazetteer, place_coordinates
+from src.utils.store_hours import StoreHoursIndex
+from src.utils.spatial_index import EARTH_RADIUS_KM, SphereKDTree, km_to_chord, to_unit_vectors
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -31,10 +35,257 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return c * r
 
 
+class StoreLocationIndex:
+    """
+    Spatial index over store coordinates
+    
+    A KD-tree on unit-sphere vectors narrows each query to nearby stores,
+    which are then ranked by exact haversine distance. The index is
+    immutable; a location reload builds a new one.
+    """
+    
+    def __init__(self, locations: List[Dict], leaf_size: int = 16):
+        self.locations = list(locations)
+        self.leaf_size = leaf_size
+        
+        lats = np.fromiter(
+            (loc['location']['latitude'] for loc in self.locations), dtype=np.float64, count=len(self.locations)
+        )
+        lons = np.fromiter(
+            (loc['location']['longitude'] for loc in self.locations), dtype=np.float64, count=len(self.locations)
+        )
+        self.lat_rad = np.radians(lats)
+        self.lon_rad = np.radians(lons)
+        self.cos_lat = np.cos(self.lat_rad)
+        self.wait_min = np.array(
+            [loc.get('current_wait_time_min') or 0 for loc in self.locations], dtype=np.float64
+        )
+        self.hours = StoreHoursIndex(
+            [loc.get('business_hours') for loc in self.locations], settings.BUSINESS_HOURS
+        )
+        self.tree = SphereKDTree(to_unit_vectors(self.lat_rad, self.lon_rad), leaf_size)
+    
+    def _distances_km(self, idx: np.ndarray, user_lat: float, user_lon: float) -> np.ndarray:
+        """Exact haversine distance from one point to the given stores"""
+        lat = math.radians(user_lat)
+        lon = math.radians(user_lon)
+        
+        a = (np.sin((self.lat_rad[idx] - lat) / 2) ** 2
+             + math.cos(lat) * self.cos_lat[idx] * np.sin((self.lon_rad[idx] - lon) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    def distances_km(self, user_lat: float, user_lon: float) -> np.ndarray:
+        """
+        Haversine distance from one point to every store
+        
+        Args:
+            user_lat: User's latitude
+            user_lon: User's longitude
+        
+        Returns:
+            Array of distances in km, aligned with self.locations
+        """
+        return self._distances_km(slice(None), user_lat, user_lon)
+    
+    def query(self,
+              user_lat: float,
+              user_lon: float,
+              max_distance_km: float,
+              limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stores within a radius, closest first
+        
+        Args:
+            user_lat: User's latitude
+            user_lon: User's longitude
+            max_distance_km: Maximum distance in km
+            limit: Return at most this many stores (k-nearest)
+        
+        Returns:
+            (store indices, distances in km), sorted by distance
+        """
+        empty = np.empty(0, dtype=np.intp), np.empty(0)
+        if not self.locations or (limit is not None and limit <= 0):
+            return empty
+        
+        point = to_unit_vectors(
+            np.array([math.radians(user_lat)]), np.array([math.radians(user_lon)])
+        )[0]
+        max_chord = km_to_chord(max_distance_km)
+        
+        if limit is None:
+            candidates = self.tree.query_radius(point, max_chord)
+        else:
+            candidates = self.tree.query_knn(point, limit, max_chord)
+        
+        distances = self._distances_km(candidates, user_lat, user_lon)
+        keep = distances <= max_distance_km
+        candidates, distances = candidates[keep], distances[keep]
+        
+        # Ties keep file order (also when trimming to the limit)
+        order = np.lexsort((candidates, distances))
+        if limit is not None:
+            order = order[:limit]
+        return candidates[order], distances[order]
+    
+    def nearest(self,
+                user_lat: float,
+                user_lon: float,
+                max_distance_km: float,
+                limit: Optional[int] = None) -> List[Dict]:
+        """
+        Stores within a radius, closest first
+        
+        Args:
+            user_lat: User's latitude
+            user_lon: User's longitude
+            max_distance_km: Maximum distance in km
+            limit: Return at most this many stores
+        
+        Returns:
+            Copies of the matching store dicts with 'distance_km' added
+        """
+        indices, distances = self.query(user_lat, user_lon, max_distance_km, limit)
+        return [self.store_with_distance(idx, distance) for idx, distance in zip(indices, distances)]
+    
+    def rank(self, indices: np.ndarray, distances: np.ndarray, at: datetime = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Order stores by distance, wait time and whether they are open
+        
+        Args:
+            indices: Store indices
+            distances: Distances in km for those stores
+            at: Time used for opening hours (default now)
+        
+        Returns:
+            (positions into indices, scores, open flags), best first
+        """
+        is_open = self.hours.open_mask(at)[indices]
+        scores = (distances
+                  + self.wait_min[indices] * settings.RANK_KM_PER_WAIT_MIN
+                  + np.where(is_open, 0.0, settings.RANK_CLOSED_PENALTY_KM))
+        order = np.lexsort((indices, scores))
+        return order, scores[order], is_open[order]
+    
+    def ranked(self,
+               user_lat: float,
+               user_lon: float,
+               max_distance_km: float,
+               limit: Optional[int] = None,
+               at: datetime = None) -> List[Dict]:
+        """
+        Stores within a radius, best first by distance, wait and open status
+        
+        Args:
+            user_lat: User's latitude
+            user_lon: User's longitude
+            max_distance_km: Maximum distance in km
+            limit: Return at most this many stores
+            at: Time used for opening hours (default now)
+        
+        Returns:
+            Copies of the store dicts with 'distance_km' and 'is_open_now' added
+        """
+        indices, distances = self.query(user_lat, user_lon, max_distance_km)
+        order, _, is_open = self.rank(indices, distances, at)
+        if limit is not None:
+            order, is_open = order[:limit], is_open[:limit]
+        
+        results = []
+        for pos, open_now in zip(order, is_open):
+            store = self.store_with_distance(indices[pos], distances[pos])
+            store['is_open_now'] = bool(open_now)
+            results.append(store)
+        return results
+    
+    def store_with_distance(self, idx: int, distance: float) -> Dict:
+        """Copy of a store dict with 'distance_km' added"""
+        location_copy = self.locations[idx].copy()
+        location_copy['distance_km'] = round(float(distance), 2)
+        return location_copy
+    
+    # Above this many stores, batch queries go through the tree instead of
+    # a dense (points x stores) distance matrix
+    BATCH_SCAN_MAX_STORES = 4096
+    
+    def nearest_batch(self,
+                      lats: np.ndarray,
+                      lons: np.ndarray,
+                      max_distance_km: float,
+                      k: int = 1,
+                      chunk_size: int = 4096) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest stores for many points in one pass
+        
+        Args:
+            lats: Latitudes in degrees
+            lons: Longitudes in degrees
+            max_distance_km: Maximum distance in km
+            k: Stores per point
+            chunk_size: Points per distance-matrix block
+        
+        Returns:
+            (indices, distances), both shaped (n, k) and sorted by distance;
+            missing slots hold -1 and inf
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        n = len(lats)
+        indices = np.full((n, k), -1, dtype=np.intp)
+        distances = np.full((n, k), np.inf)
+        if not n or not self.locations or k <= 0:
+            return indices, distances
+        
+        if len(self.locations) > self.BATCH_SCAN_MAX_STORES:
+            for row in range(n):
+                idx, dist = self.query(lats[row], lons[row], max_distance_km, limit=k)
+                indices[row, :len(idx)] = idx
+                distances[row, :len(dist)] = dist
+            return indices, distances
+        
+        kk = min(k, len(self.locations))
+        for start in range(0, n, chunk_size):
+            lat = np.radians(lats[start:start + chunk_size])[:, None]
+            lon = np.radians(lons[start:start + chunk_size])[:, None]
+            a = (np.sin((self.lat_rad - lat) / 2) ** 2
+                 + np.cos(lat) * self.cos_lat * np.sin((self.lon_rad - lon) / 2) ** 2)
+            block = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            
+            if kk < block.shape[1]:
+                top = np.argpartition(block, kk - 1, axis=1)[:, :kk]
+            else:
+                top = np.broadcast_to(np.arange(kk), (block.shape[0], kk))
+            top_dist = np.take_along_axis(block, top, axis=1)
+            
+            # Sort each row by distance, ties by store order
+            order = np.lexsort((top, top_dist), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_dist = np.take_along_axis(top_dist, order, axis=1)
+            
+            outside = top_dist > max_distance_km
+            rows = slice(start, start + len(lat))
+            indices[rows, :kk] = np.where(outside, -1, top)
+            distances[rows, :kk] = np.where(outside, np.inf, top_dist)
+        
+        return indices, distances
+
+
+# Built with each data snapshot, and rebuilt only when locations reload
+register_snapshot_index(
+    'store_index', ('locations',),
+    lambda backend, indexes: StoreLocationIndex(backend.all_locations())
+)
+
+def get_store_index() -> StoreLocationIndex:
+    """Get the store index for the current location data"""
+    return get_data_loader().index('store_index')
+
+
 def find_nearby_locations(
     user_lat: float, 
     user_lon: float, 
-    max_distance_km: float = None
+    max_distance_km: float = None,
+    limit: int = None
 ) -> List[Dict]:
     """
     Find stores near the user's location
@@ -43,6 +294,7 @@ def find_nearby_locations(
         user_lat: User's latitude
         user_lon: User's longitude
         max_distance_km: Maximum distance in km (default from settings)
+        limit: Return at most this many stores (default all)
     
     Returns:
         List of nearby stores sorted by distance
@@ -50,32 +302,7 @@ def find_nearby_locations(
     if max_distance_km is None:
         max_distance_km = settings.MAX_SEARCH_RADIUS_KM
     
-    # Load locations
-    locations_file = settings.LOCATIONS_FILE
-    if not locations_file.exists():
-        return []
-    
-    with open(locations_file, 'r') as f:
-        locations = json.load(f)
-    
-    # Calculate distances and filter
-    nearby = []
-    for location in locations:
-        loc_data = location['location']
-        distance = haversine_distance(
-            user_lat, user_lon,
-            loc_data['latitude'], loc_data['longitude']
-        )
-        
-        if distance <= max_distance_km:
-            location_copy = location.copy()
-            location_copy['distance_km'] = round(distance, 2)
-            nearby.append(location_copy)
-    
-    # Sort by distance
-    nearby.sort(key=lambda x: x['distance_km'])
-    
-    return nearby
+    return get_store_index().nearest(user_lat, user_lon, max_distance_km, limit=limit)
 
 
 def get_closest_location(user_lat: float, user_lon: float) -> Dict:
@@ -89,10 +316,221 @@ def get_closest_location(user_lat: float, user_lon: float) -> Dict:
     Returns:
         Closest store or None
     """
-    nearby = find_nearby_locations(user_lat, user_lon, max_distance_km=50)
+    nearby = find_nearby_locations(user_lat, user_lon, max_distance_km=50, limit=1)
     return nearby[0] if nearby else None
 
 
+def rank_nearby_locations(
+    user_lat: float,
+    user_lon: float,
+    max_distance_km: float = None,
+    limit: int = None,
+    at: datetime = None
+) -> List[Dict]:
+    """
+    Find stores near the user, ranked by distance, wait time and open status
+    
+    Args:
+        user_lat: User's latitude
+        user_lon: User's longitude
+        max_distance_km: Maximum distance in km (default from settings)
+        limit: Return at most this many stores (default all)
+        at: Time used for opening hours (default now)
+    
+    Returns:
+        List of nearby stores, best first, with 'is_open_now' set
+    """
+    if max_distance_km is None:
+        max_distance_km = settings.MAX_SEARCH_RADIUS_KM
+    
+    return get_store_index().ranked(user_lat, user_lon, max_distance_km, limit=limit, at=at)
+
+
+class NearestStoreCache:
+    """
+    Nearest stores per customer for one store index, computed in batches
+    and reused across turns
+    
+    Each entry keeps the customer's closest candidate stores, so both the
+    nearest store and the best-ranked store (which depends on the time of
+    day) come from the cache. A cache belongs to exactly one store index
+    and is replaced together with it, so positions are never read against
+    a different store list. Entries are recomputed when a customer's
+    coordinates differ.
+    """
+    
+    def __init__(self, index: StoreLocationIndex, entries: Dict = None):
+        """
+        Args:
+            index: Store index the cached positions refer to
+            entries: Entries to start from (only valid for the same index)
+        """
+        self.index = index
+        # customer_id -> (latitude, longitude, max_distance_km, store indices, distances)
+        self._entries: Dict[str, Tuple[float, float, float, np.ndarray, np.ndarray]] = dict(entries or {})
+    
+    def precompute(self, customers: List[Dict], max_distance_km: float):
+        """
+        Compute and cache candidate stores for many customers at once
+        
+        Args:
+            customers: Customer dicts with a 'location'
+            max_distance_km: Maximum distance in km
+        """
+        rows = []
+        for customer in customers:
+            loc = customer.get('location') or {}
+            if customer.get('customer_id') and loc.get('latitude') and loc.get('longitude'):
+                rows.append((customer['customer_id'], loc['latitude'], loc['longitude']))
+        if not rows:
+            return
+        
+        lats = np.array([row[1] for row in rows])
+        lons = np.array([row[2] for row in rows])
+        indices, distances = self.index.nearest_batch(
+            lats, lons, max_distance_km, k=settings.RANKING_CANDIDATES
+        )
+        
+        entries = dict(self._entries)
+        for (customer_id, lat, lon), idx, dist in zip(rows, indices, distances):
+            found = idx >= 0
+            entries[customer_id] = (lat, lon, max_distance_km, idx[found], dist[found])
+        self._entries = entries
+    
+    def _candidates(self, customer_id: Optional[str], lat: float, lon: float,
+                    max_distance_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        entry = self._entries.get(customer_id) if customer_id else None
+        if entry and entry[:3] == (lat, lon, max_distance_km):
+            return entry[3], entry[4]
+        
+        indices, distances = self.index.query(lat, lon, max_distance_km, limit=settings.RANKING_CANDIDATES)
+        if customer_id:
+            self._entries[customer_id] = (lat, lon, max_distance_km, indices, distances)
+        return indices, distances
+    
+    def get(self, customer_id: Optional[str], lat: float, lon: float, max_distance_km: float) -> Optional[Dict]:
+        """
+        Nearest store for a customer, from cache when their location is unchanged
+        
+        Args:
+            customer_id: Customer ID (None disables caching)
+            lat: Customer latitude
+            lon: Customer longitude
+            max_distance_km: Maximum distance in km
+        
+        Returns:
+            Store dict with 'distance_km', or None if none is in range
+        """
+        indices, distances = self._candidates(customer_id, lat, lon, max_distance_km)
+        if not len(indices):
+            return None
+        return self.index.store_with_distance(indices[0], distances[0])
+    
+    def get_best(self, customer_id: Optional[str], lat: float, lon: float,
+                 max_distance_km: float, at: datetime = None) -> Optional[Dict]:
+        """
+        Best-ranked store for a customer at a given time
+        
+        Args:
+            customer_id: Customer ID (None disables caching)
+            lat: Customer latitude
+            lon: Customer longitude
+            max_distance_km: Maximum distance in km
+            at: Time used for opening hours (default now)
+        
+        Returns:
+            Store dict with 'distance_km' and 'is_open_now', or None
+        """
+        indices, distances = self._candidates(customer_id, lat, lon, max_distance_km)
+        if not len(indices):
+            return None
+        order, _, is_open = self.index.rank(indices, distances, at)
+        store = self.index.store_with_distance(indices[order[0]], distances[order[0]])
+        store['is_open_now'] = bool(is_open[0])
+        return store
+
+
+# Radius of the last precompute_nearest_stores call, re-applied to every
+# customer whenever the cache is rebuilt (None: entries fill in lazily)
+_precompute_radius_km = None
+
+def _build_nearest_store_cache(backend, indexes) -> NearestStoreCache:
+    index = indexes['store_index']
+    previous = indexes.get('nearest_stores')
+    # Entries carry over while the store list is the same; each is checked
+    # against the customer's coordinates on use
+    entries = previous._entries if previous is not None and previous.index is index else None
+    cache = NearestStoreCache(index, entries)
+    if _precompute_radius_km is not None:
+        cache.precompute(backend.all_customers(), _precompute_radius_km)
+    return cache
+
+# Built with each data snapshot, after the store index it belongs to
+register_snapshot_index('nearest_stores', ('locations', 'customers'), _build_nearest_store_cache)
+
+def get_nearest_store_cache() -> NearestStoreCache:
+    """Nearest-store cache for the current store index"""
+    return get_data_loader().index('nearest_stores')
+
+def precompute_nearest_stores(customers: List[Dict] = None, max_distance_km: float = None):
+    """
+    Batch-compute candidate stores for customers' saved locations
+    
+    Without an explicit customer list the precompute is repeated for all
+    customers whenever locations or customers are reloaded.
+    
+    Args:
+        customers: Customers to precompute (default all loaded customers)
+        max_distance_km: Maximum distance in km (default from settings)
+    """
+    global _precompute_radius_km
+    if max_distance_km is None:
+        max_distance_km = settings.MAX_SEARCH_RADIUS_KM
+    if customers is None:
+        _precompute_radius_km = max_distance_km
+        customers = get_data_loader().customers
+    get_nearest_store_cache().precompute(customers, max_distance_km)
+
+
+def get_customer_nearest_store(customer: Dict, max_distance_km: float = None) -> Optional[Dict]:
+    """
+    Nearest store to a customer's saved location, cached per customer
+    
+    Args:
+        customer: Customer dict with a 'location'
+        max_distance_km: Maximum distance in km (default from settings)
+    
+    Returns:
+        Store dict with 'distance_km', or None if none is in range
+    """
+    if max_distance_km is None:
+        max_distance_km = settings.MAX_SEARCH_RADIUS_KM
+    loc = customer.get('location') or {}
+    return get_nearest_store_cache().get(
+        customer.get('customer_id'), loc.get('latitude'), loc.get('longitude'), max_distance_km
+    )
+
+
+def get_customer_best_store(customer: Dict, max_distance_km: float = None, at: datetime = None) -> Optional[Dict]:
+    """
+    Best store for a customer right now: close, open and with a short wait
+    
+    Args:
+        customer: Customer dict with a 'location'
+        max_distance_km: Maximum distance in km (default from settings)
+        at: Time used for opening hours (default now)
+    
+    Returns:
+        Store dict with 'distance_km' and 'is_open_now', or None
+    """
+    if max_distance_km is None:
+        max_distance_km = settings.MAX_SEARCH_RADIUS_KM
+    loc = customer.get('location') or {}
+    return get_nearest_store_cache().get_best(
+        customer.get('customer_id'), loc.get('latitude'), loc.get('longitude'), max_distance_km, at=at
+    )
+
+
 def format_location_info(location: Dict) -> str:
     """
     Format location information for display
@@ -140,9 +578,23 @@ def is_weather_relevant(temperature_celsius: float, condition: str) -> Dict[str,
     }
 
 
+# Built with each data snapshot, and rebuilt only when locations or
+# customers reload
+register_snapshot_index(
+    'gazetteer', ('locations', 'customers'),
+    lambda backend, indexes: build_gazetteer(
+        backend.all_locations(), backend.all_customers(), settings.GAZETTEER_FILE
+    )
+)
+
+def get_gazetteer() -> Gazetteer:
+    """Get the gazetteer for the current store and customer data"""
+    return get_data_loader().index('gazetteer')
+
+
 def parse_user_location(location_str: str) -> Tuple[float, float]:
     """
-    Parse location from user input (placeholder for future geocoding)
+    Parse location from user input using the offline gazetteer
     
     Args:
         location_str: Location string (e.g., "Connaught Place, Delhi")
@@ -150,7 +602,9 @@ def parse_user_location(location_str: str) -> Tuple[float, float]:
     Returns:
         (latitude, longitude) tuple, defaults to Delhi center if not found
     """
-    # For MVP, return default Delhi location
-    # In production, this would use a geocoding API
+    coords = place_coordinates(get_gazetteer().lookup(location_str or ''))
+    if coords:
+        return coords
+    
     default = settings.DEFAULT_LOCATION
     return default['latitude'], default['longitude']
\ No newline at end of file
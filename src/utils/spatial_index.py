@@ -0,0 +1,185 @@
+"""
+KD-tree over 3D unit-sphere coordinates for store lookups
+Straight-line (chord) distance between unit vectors grows monotonically
+with great-circle distance, so nearest neighbours in 3D are nearest on
+the globe and a radius in km maps to a chord length
+"""
+import heapq
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# Relative chord distance within which k-nearest treats points as tied
+TIE_TOLERANCE = 1e-9
+
+
+def to_unit_vectors(lat_rad: np.ndarray, lon_rad: np.ndarray) -> np.ndarray:
+    """Convert latitude/longitude in radians to an (n, 3) array of unit vectors"""
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)))
+
+
+def km_to_chord(distance_km: float) -> float:
+    """Chord length on the unit sphere for a great-circle distance"""
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    # Padded slightly: results are refined with exact haversine afterwards
+    return 2 * math.sin(angle / 2) * (1 + 1e-9) + 1e-12
+
+
+class SphereKDTree:
+    """Static KD-tree with median splits; rebuild to add points"""
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 16):
+        """
+        Args:
+            points: (n, 3) array of unit vectors
+            leaf_size: Maximum number of points in a leaf
+        """
+        self.points = points
+        self.leaf_size = max(1, leaf_size)
+        self.perm = np.arange(len(points))
+
+        # Flat node arrays: a leaf covers perm[start:end]; inner nodes split
+        # on `dim` at `split` with children `left`/`right`
+        self._start: List[int] = []
+        self._end: List[int] = []
+        self._dim: List[int] = []
+        self._split: List[float] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+
+        if len(points):
+            self._build(0, len(points))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _new_node(self, start: int, end: int) -> int:
+        self._start.append(start)
+        self._end.append(end)
+        self._dim.append(-1)
+        self._split.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        return len(self._start) - 1
+
+    def _build(self, start: int, end: int) -> int:
+        node = self._new_node(start, end)
+        if end - start <= self.leaf_size:
+            return node
+
+        idx = self.perm[start:end]
+        sub = self.points[idx]
+        dim = int(np.argmax(sub.max(axis=0) - sub.min(axis=0)))
+        mid = (start + end) // 2
+
+        order = np.argpartition(sub[:, dim], mid - start)
+        self.perm[start:end] = idx[order]
+
+        self._dim[node] = dim
+        self._split[node] = float(self.points[self.perm[mid], dim])
+        self._left[node] = self._build(start, mid)
+        self._right[node] = self._build(mid, end)
+        return node
+
+    def _leaf_distances(self, node: int, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        idx = self.perm[self._start[node]:self._end[node]]
+        return idx, np.linalg.norm(self.points[idx] - query, axis=1)
+
+    def query_radius(self, query: np.ndarray, max_chord: float) -> np.ndarray:
+        """
+        Indices of all points within a chord distance of the query
+
+        Args:
+            query: Unit vector of the query point
+            max_chord: Maximum chord distance
+
+        Returns:
+            Array of point indices (unordered)
+        """
+        if not len(self.points):
+            return np.empty(0, dtype=np.intp)
+
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            dim = self._dim[node]
+            if dim < 0:
+                idx, dist = self._leaf_distances(node, query)
+                found.append(idx[dist <= max_chord])
+                continue
+
+            diff = query[dim] - self._split[node]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            if abs(diff) <= max_chord:
+                stack.append(far)
+            stack.append(near)
+
+        return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+    def query_knn(self, query: np.ndarray, k: int, max_chord: float = math.inf) -> np.ndarray:
+        """
+        Indices of the k nearest points within a chord distance
+
+        Args:
+            query: Unit vector of the query point
+            k: Number of neighbours
+            max_chord: Ignore points further than this
+
+        Returns:
+            Array of point indices (unordered); may hold a few more than k
+            when points tie with the k-th
+        """
+        if k <= 0 or not len(self.points):
+            return np.empty(0, dtype=np.intp)
+
+        # Max-heap of (-distance, -index) holding the best k so far; on equal
+        # distance the lower index wins, so ties keep file order
+        best: List[Tuple[float, int]] = []
+        bound = max_chord
+        # Points that were within reach when visited. Points tied (to
+        # rounding) with the k-th one are returned as well, so the caller's
+        # exact distances and file order settle the boundary
+        seen_idx, seen_dist = [], []
+
+        def reach(b: float) -> float:
+            return b * (1 + TIE_TOLERANCE) + TIE_TOLERANCE
+
+        def visit(node: int):
+            nonlocal bound
+            dim = self._dim[node]
+            if dim < 0:
+                idx, dist = self._leaf_distances(node, query)
+                near = np.flatnonzero(dist <= reach(bound))
+                if not len(near):
+                    return
+                seen_idx.append(idx[near])
+                seen_dist.append(dist[near])
+                for i in near:
+                    if dist[i] > bound:
+                        continue
+                    item = (-float(dist[i]), -int(idx[i]))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+                if len(best) == k:
+                    bound = min(bound, -best[0][0])
+                return
+
+            diff = query[dim] - self._split[node]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            visit(near)
+            if abs(diff) <= reach(bound):
+                visit(far)
+
+        visit(0)
+        if not best:
+            return np.empty(0, dtype=np.intp)
+        idx, dist = np.concatenate(seen_idx), np.concatenate(seen_dist)
+        # Each point lives in one leaf, so there are no duplicates
+        return idx[dist <= reach(-best[0][0])]
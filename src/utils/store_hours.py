@@ -0,0 +1,137 @@
+"""
+Store business hours compiled to minute-of-week intervals
+Hours strings such as "09:00-01:00" (closing after midnight) are parsed
+once, so checking which stores are open at a given time is one vectorized
+comparison over all stores
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def parse_hours_range(hours: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an "HH:MM-HH:MM" range into (open, close) minutes after midnight
+
+    A close time at or before the open time means the store closes after
+    midnight; "00:00-24:00" and equal open/close times mean open all day.
+
+    Args:
+        hours: Hours string
+
+    Returns:
+        (open_minute, close_minute) with close > open (possibly past 1440),
+        or None if the string cannot be parsed
+    """
+    try:
+        start_str, end_str = hours.strip().split('-')
+        start_h, start_m = (int(part) for part in start_str.strip().split(':'))
+        end_h, end_m = (int(part) for part in end_str.strip().split(':'))
+    except (AttributeError, ValueError):
+        return None
+
+    start = start_h * 60 + start_m
+    end = end_h * 60 + end_m
+    if not (0 <= start < MINUTES_PER_DAY and 0 <= end <= MINUTES_PER_DAY):
+        return None
+
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def minute_of_week(at: datetime) -> int:
+    """Minutes since Monday 00:00 for a datetime"""
+    return at.weekday() * MINUTES_PER_DAY + at.hour * 60 + at.minute
+
+
+def compile_weekly_intervals(hours: Union[str, Dict[str, str], None]) -> Optional[List[Tuple[int, int]]]:
+    """
+    Minute-of-week intervals for a store's hours
+
+    Args:
+        hours: One range used every day, or a weekday -> range dict
+            (like Settings.BUSINESS_HOURS)
+
+    Returns:
+        List of (start, end) intervals within [0, MINUTES_PER_WEEK), or
+        None if the hours are missing or unparseable
+    """
+    if isinstance(hours, dict):
+        daily = [hours.get(day) for day in WEEKDAYS]
+    elif isinstance(hours, str):
+        daily = [hours] * 7
+    else:
+        return None
+
+    intervals = []
+    for day, day_hours in enumerate(daily):
+        if day_hours is None:
+            continue
+        parsed = parse_hours_range(day_hours)
+        if parsed is None:
+            return None
+
+        start = day * MINUTES_PER_DAY + parsed[0]
+        end = day * MINUTES_PER_DAY + parsed[1]
+        if end <= MINUTES_PER_WEEK:
+            intervals.append((start, end))
+        else:
+            # Sunday night spilling into Monday morning
+            intervals.append((start, MINUTES_PER_WEEK))
+            intervals.append((0, end - MINUTES_PER_WEEK))
+
+    return intervals
+
+
+class StoreHoursIndex:
+    """Weekly opening intervals for many stores as flat arrays"""
+
+    def __init__(self, hours: List[Union[str, Dict[str, str], None]], default_hours=None):
+        """
+        Args:
+            hours: Hours per store, in store order
+            default_hours: Used for stores with missing hours; stores whose
+                hours are still unknown are treated as always open
+        """
+        stores, starts, ends = [], [], []
+        self.always_open = np.zeros(len(hours), dtype=bool)
+
+        default_intervals = compile_weekly_intervals(default_hours)
+        for store, store_hours in enumerate(hours):
+            intervals = compile_weekly_intervals(store_hours)
+            if intervals is None:
+                intervals = default_intervals
+            if intervals is None:
+                self.always_open[store] = True
+                continue
+            for start, end in intervals:
+                stores.append(store)
+                starts.append(start)
+                ends.append(end)
+
+        self.size = len(hours)
+        self._store = np.array(stores, dtype=np.intp)
+        self._start = np.array(starts, dtype=np.int32)
+        self._end = np.array(ends, dtype=np.int32)
+
+    def open_mask(self, at: datetime = None) -> np.ndarray:
+        """
+        Which stores are open at a time
+
+        Args:
+            at: Time to check (default now)
+
+        Returns:
+            Boolean array aligned with the store list
+        """
+        minute = minute_of_week(at or datetime.now())
+        mask = self.always_open.copy()
+        hits = (self._start <= minute) & (minute < self._end)
+        mask[self._store[hits]] = True
+        return mask